@@ -0,0 +1,117 @@
+"""Backfill daily mastery rollups from existing user responses."""
+
+import argparse
+import asyncio
+import os
+from datetime import datetime
+from typing import Optional
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from services.mastery_rollups import group_daily_totals, load_rollups, replace_rollups
+from services.mastery_state import totals_match
+from services.question_catalog import QuestionCatalog
+from services.response_stats import SCORING_PROJECTION, STREAM_BATCH_SIZE
+from services.state_backfills import REBUILD_ATTEMPTS
+
+
+async def backfill_user(db, user_id: str, catalog: QuestionCatalog) -> Optional[int]:
+    """Recompute one user's rollups from their responses, returning the rollup count.
+
+    Submits that land while the rollups are rewritten may be overwritten, so
+    the stored rollups are read back and compared with a fresh pass over the
+    history, and the rewrite repeats until they agree. Returns None if they
+    never did.
+    """
+    started = datetime.utcnow()
+    grouped = await _load_daily_totals(db, user_id, catalog)
+    for _ in range(REBUILD_ATTEMPTS):
+        await replace_rollups(db, user_id, grouped, started)
+        stored = {
+            (rollup["sub_concept"], rollup["day"]): rollup
+            for rollup in await load_rollups(db, user_id)
+        }
+        started = datetime.utcnow()
+        grouped = await _load_daily_totals(db, user_id, catalog)
+        if totals_match(stored, grouped):
+            return len(grouped)
+    return None
+
+
+async def _load_daily_totals(db, user_id: str, catalog: QuestionCatalog):
+    cursor = db["user_responses"].find(
+        {"user_id": user_id}, {**SCORING_PROJECTION, "timestamp": 1}
+    ).sort("timestamp", 1).batch_size(STREAM_BATCH_SIZE)
+
+    # Group batch by batch so only the daily sums are held in memory.
+    grouped = {}
+    batch = []
+    async for response in cursor:
+        batch.append(response)
+        if len(batch) >= STREAM_BATCH_SIZE:
+            _fold(grouped, group_daily_totals(catalog.merge(batch)))
+            batch = []
+    if batch:
+        _fold(grouped, group_daily_totals(catalog.merge(batch)))
+    return grouped
+
+
+def _fold(grouped, partial) -> None:
+    for key, totals in partial.items():
+        target = grouped.get(key)
+        if target is None:
+            grouped[key] = totals
+            continue
+        for field, value in totals.items():
+            target[field] += value
+
+
+async def backfill(db, user_id: Optional[str] = None) -> int:
+    """Rebuild rollups for one or all users, returning how many could not be settled."""
+    if user_id:
+        user_ids = [user_id]
+    else:
+        user_ids = await db["user_responses"].distinct("user_id")
+
+    catalog = QuestionCatalog()
+    await catalog.load(db)
+
+    rollups = 0
+    failures = 0
+    for current_user in user_ids:
+        count = await backfill_user(db, current_user, catalog)
+        if count is None:
+            failures += 1
+            print(f"{current_user}: submits kept changing rollups during the backfill; retry later")
+            continue
+        rollups += count
+
+    print(f"Backfilled {rollups} daily rollups for {len(user_ids)} users")
+    return failures
+
+
+async def main() -> None:
+    """Connect to MongoDB and backfill daily rollups."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--user-id", help="Only backfill rollups for this user")
+    args = parser.parse_args()
+
+    load_dotenv()
+    mongo_uri = os.getenv("MONGO_URI")
+    database_name = os.getenv("DATABASE_NAME")
+    if not mongo_uri or not database_name:
+        raise ValueError("MONGO_URI and DATABASE_NAME must be set")
+
+    client = AsyncIOMotorClient(mongo_uri)
+    db = client[database_name]
+
+    failures = await backfill(db, args.user_id)
+
+    client.close()
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
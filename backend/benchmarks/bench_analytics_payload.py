@@ -0,0 +1,124 @@
+"""Payload size and serialization time of GET /analytics/{user_id}.
+
+Builds a realistic payload for a user weak in every sub-concept from
+question_master.json, so no database is needed. It serializes the payload
+the way the route did before typed response models (jsonable_encoder and
+JSONResponse) and the way it does now (AnalyticsResponse dumped to JSON by
+pydantic-core), then does the same for a lean request. It reports body
+sizes raw and gzip-compressed, plus brotli when the brotli package is
+installed. Run from the backend directory:
+
+    python -m benchmarks.bench_analytics_payload --repeat 2000
+"""
+
+import argparse
+import gzip
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from constants import CONCEPTS
+from models import AnalyticsResponse
+from services.analytics_views import shape_analytics
+from services.question_catalog import QuestionCatalog
+from services.recommendation_engine import generate_recommendations
+from services.scoring_engine import (
+    compute_concept_mastery,
+    compute_mastery_from_totals,
+    compute_overall_mastery,
+    get_top_weak_areas,
+)
+
+QUESTION_MASTER = Path(__file__).resolve().parents[2] / "question_master.json"
+LEAN_REQUEST = {
+    "fields": ["overall_mastery", "concept_mastery", "weak_areas", "recommendations"],
+    "recommendation_detail": "ids",
+    "precision": 2,
+}
+
+
+def build_payload(catalog: QuestionCatalog, rng: random.Random) -> Dict[str, Any]:
+    """Return the full analytics payload for a synthetic user."""
+    results = {}
+    for sub_concepts in CONCEPTS.values():
+        for sub_concept in sub_concepts:
+            attempts = rng.randint(10, 80)
+            correct = rng.randint(0, attempts // 2)
+            results[sub_concept] = compute_mastery_from_totals(
+                {
+                    "total_attempts": attempts,
+                    "correct_count": correct,
+                    "difficulty_attempted": 2 * attempts,
+                    "difficulty_correct": 2 * correct,
+                    "time_score_sum": attempts * rng.random(),
+                    "time_score_count": attempts,
+                    "attempts_sum": attempts,
+                }
+            )
+            results[sub_concept]["percentile"] = rng.random() * 100
+    weak_areas = get_top_weak_areas(results)
+    return {
+        "overall_mastery": compute_overall_mastery(results),
+        "concept_mastery": compute_concept_mastery(results),
+        "subconcept_mastery": results,
+        "weak_areas": weak_areas,
+        "recommendations": generate_recommendations(weak_areas, catalog),
+    }
+
+
+def before(payload: Dict[str, Any]) -> bytes:
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def after(payload: Dict[str, Any]) -> bytes:
+    return AnalyticsResponse.model_validate(payload).model_dump_json(exclude_unset=True).encode()
+
+
+def _median_us(serialize: Callable[[], bytes], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        serialize()
+        samples.append((time.perf_counter() - started) * 1_000_000.0)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    """Report body sizes and serialization times for each variant."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    catalog = QuestionCatalog()
+    catalog.index(json.loads(QUESTION_MASTER.read_text(encoding="utf-8")), version=1)
+    payload = build_payload(catalog, random.Random(5))
+    assert json.loads(before(payload)) == json.loads(after(payload))
+
+    variants = [
+        ("full, before", lambda: before(payload)),
+        ("full, after", lambda: after(payload)),
+        ("lean, after", lambda: after(shape_analytics(payload, **LEAN_REQUEST))),
+    ]
+    print(f"{'variant':14} {'raw B':>8} {'gzip B':>8} {'br B':>8} {'serialize us':>13}")
+    for name, serialize in variants:
+        body = serialize()
+        compressed = len(brotli.compress(body, quality=4)) if brotli else float("nan")
+        print(
+            f"{name:14} {len(body):8d} {len(gzip.compress(body, compresslevel=6)):8d}"
+            f" {compressed:8.0f} {_median_us(serialize, args.repeat):13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
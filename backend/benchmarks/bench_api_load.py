@@ -0,0 +1,255 @@
+"""Load test for the quiz and analytics endpoints against a local mongod.
+
+Seeds a scratch database with N users x M responses drawn from
+question_master.json (with mastery state and daily rollups built the way
+the rebuild and backfill commands would), then drives the ASGI app
+in-process at a fixed concurrency. Reports p50/p95/p99 latency, throughput
+and MongoDB commands per request for each endpoint, and compares against a
+stored baseline. Run from the backend directory:
+
+    python -m benchmarks.bench_api_load --users 1000 --responses 200 --concurrency 32
+    python -m benchmarks.bench_api_load --save-baseline
+
+Requires httpx (pip install httpx).
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+import database
+from indexes import ensure_indexes
+from services.mastery_rollups import group_daily_totals, replace_rollups
+from services.mastery_state import MASTERY_STATE_COLLECTION, group_totals, replace_state
+from services.question_catalog import QuestionCatalog
+from services.state_backfills import mark_backfilled
+
+QUESTION_MASTER = Path(__file__).resolve().parents[2] / "question_master.json"
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "api_load.json"
+ENDPOINTS = ("quiz", "submit", "analytics")
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Count every command the driver sends, i.e. database round trips."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        self.count += 1
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        pass
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        pass
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of an ascending list."""
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+async def seed(db, questions: List[Dict[str, Any]], users: int, responses: int, seed_value: int) -> None:
+    """Insert synthetic history and the derived state the routes read."""
+    await db.client.drop_database(db.name)
+    await db.questions.insert_many([dict(question) for question in questions])
+    await ensure_indexes(db)
+    catalog = QuestionCatalog()
+    await catalog.load(db)
+
+    rng = random.Random(seed_value)
+    start = datetime.utcnow() - timedelta(days=90)
+    for user_index in range(users):
+        user_id = f"bench-user-{user_index}"
+        skill = rng.uniform(0.3, 0.9)
+        documents = []
+        for response_index in range(responses):
+            question = rng.choice(questions)
+            documents.append(
+                {
+                    "user_id": user_id,
+                    "question_id": question["question_id"],
+                    "is_correct": rng.random() < skill - 0.1 * (question["difficulty"] - 2),
+                    "time_taken": int(question["expected_time"] * rng.uniform(0.3, 2.5)),
+                    "attempts": 1,
+                    "timestamp": start + timedelta(days=90 * response_index / responses),
+                }
+            )
+        if documents:
+            await db.user_responses.insert_many(documents)
+        merged = catalog.merge(documents)
+        await replace_state(db, user_id, group_totals(merged))
+        await replace_rollups(db, user_id, group_daily_totals(merged))
+        # Nothing else writes while seeding, so the state is complete as written.
+        await mark_backfilled(db, [user_id], [MASTERY_STATE_COLLECTION])
+
+
+def request_factory(
+    endpoint: str, questions: List[Dict[str, Any]], users: int, rng: random.Random
+) -> Callable[[], Tuple[str, str, Optional[Dict[str, Any]]]]:
+    """Return a callable producing (method, path, json body) for one request."""
+
+    def user_id() -> str:
+        return f"bench-user-{rng.randrange(users)}"
+
+    if endpoint == "quiz":
+        return lambda: ("GET", f"/quiz?user_id={user_id()}", None)
+    if endpoint == "analytics":
+        return lambda: ("GET", f"/analytics/{user_id()}", None)
+    if endpoint == "review":
+        return lambda: ("GET", f"/quiz/review?user_id={user_id()}", None)
+
+    def submit() -> Tuple[str, str, Optional[Dict[str, Any]]]:
+        picked = rng.sample(questions, 10)
+        return (
+            "POST",
+            "/quiz/submit",
+            {
+                "user_id": user_id(),
+                "responses": [
+                    {
+                        "question_id": question["question_id"],
+                        "selected_option": rng.choice(["A", "B", "C", "D"]),
+                        "time_taken": rng.randint(5, 2 * question["expected_time"]),
+                    }
+                    for question in picked
+                ],
+            },
+        )
+
+    return submit
+
+
+async def drive(
+    client, make_request, requests: int, concurrency: int, counter: CommandCounter
+) -> Dict[str, Any]:
+    """Issue `requests` requests from `concurrency` workers and summarize latency."""
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for _ in remaining:
+            method, path, body = make_request()
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append((time.perf_counter() - started) * 1000.0)
+            if response.status_code >= 400:
+                errors += 1
+
+    commands_before = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "throughput_rps": requests / elapsed if elapsed else 0.0,
+        "db_round_trips": (counter.count - commands_before) / requests,
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> bool:
+    """Print deltas against a baseline and return False on any regression."""
+    ok = True
+    for endpoint, result in results.items():
+        previous = baseline.get(endpoint)
+        if not previous:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "db_round_trips"):
+            before, after = previous[metric], result[metric]
+            change = (after - before) / before if before else 0.0
+            regressed = change > tolerance
+            ok = ok and not regressed
+            flag = "  REGRESSION" if regressed else ""
+            print(f"  {endpoint:10} {metric:15} {before:10.3f} -> {after:10.3f} ({change:+.1%}){flag}")
+    return ok
+
+
+async def main() -> None:
+    """Seed, drive every endpoint, and report or record the results."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="dsa_load_benchmark")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--responses", type=int, default=200, help="Responses per user")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the previously seeded database")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed fractional regression")
+    args = parser.parse_args()
+
+    try:
+        import httpx
+    except ImportError as exc:
+        raise SystemExit("bench_api_load requires the httpx package") from exc
+
+    questions = json.loads(QUESTION_MASTER.read_text(encoding="utf-8"))
+    # The app's lifespan reuses this client, pointed at the scratch database.
+    counter = CommandCounter()
+    db = database.connect(args.uri, args.database, event_listeners=[counter])
+    if not args.skip_seed:
+        started = time.perf_counter()
+        await seed(db, questions, args.users, args.responses, args.seed)
+        print(f"Seeded {args.users} users x {args.responses} responses in {time.perf_counter() - started:.1f}s")
+
+    from main import app
+
+    scenario = f"users={args.users} responses={args.responses} concurrency={args.concurrency}"
+    rng = random.Random(args.seed)
+    results: Dict[str, Dict[str, Any]] = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for endpoint in args.endpoints.split(","):
+                make_request = request_factory(endpoint, questions, args.users, rng)
+                await drive(client, make_request, min(args.requests, 50), args.concurrency, counter)
+                results[endpoint] = await drive(
+                    client, make_request, args.requests, args.concurrency, counter
+                )
+
+    print(scenario)
+    print(f"{'endpoint':10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>9} {'db/req':>7} {'errors':>6}")
+    for endpoint, result in results.items():
+        print(
+            f"{endpoint:10} {result['p50_ms']:8.2f} {result['p95_ms']:8.2f} {result['p99_ms']:8.2f}"
+            f" {result['throughput_rps']:9.1f} {result['db_round_trips']:7.2f} {result['errors']:6d}"
+        )
+
+    baselines = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+    ok = True
+    if args.save_baseline:
+        baselines[scenario] = results
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Saved baseline to {args.baseline}")
+    elif scenario in baselines:
+        print(f"Against baseline ({args.baseline}):")
+        ok = compare(results, baselines[scenario], args.tolerance)
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
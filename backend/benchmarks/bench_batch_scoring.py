@@ -0,0 +1,116 @@
+"""Benchmark batch mastery scoring against the scalar scoring engine.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_batch_scoring --responses 1000000
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from services.batch_scoring import compute_mastery_batch
+from services.scoring_engine import compute_subconcept_mastery
+
+QUESTION_MASTER = Path(__file__).resolve().parents[2] / "question_master.json"
+
+
+def _generate(responses: int, users: int, seed: int) -> Dict[str, np.ndarray]:
+    """Build random merged responses drawn from the question master."""
+    questions = json.loads(QUESTION_MASTER.read_text(encoding="utf-8"))
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(questions), responses)
+    expected = np.array([question["expected_time"] for question in questions])[picks]
+    return {
+        "user_ids": np.array([f"user-{index}" for index in range(users)])[
+            rng.integers(0, users, responses)
+        ],
+        "sub_concepts": np.array([question["sub_concept"] for question in questions])[picks],
+        "is_correct": rng.random(responses) < 0.6,
+        "difficulty": np.array([question["difficulty"] for question in questions])[picks],
+        "time_taken": (expected * rng.uniform(0.3, 2.5, responses)).astype(np.int64),
+        "expected_time": expected,
+        "attempts": rng.integers(1, 3, responses),
+    }
+
+
+def _scalar(columns: Dict[str, np.ndarray]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """Group columns into lists of dicts and score them with the scalar engine."""
+    grouped: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for row in zip(
+        columns["user_ids"].tolist(),
+        columns["sub_concepts"].tolist(),
+        columns["is_correct"].tolist(),
+        columns["difficulty"].tolist(),
+        columns["time_taken"].tolist(),
+        columns["expected_time"].tolist(),
+        columns["attempts"].tolist(),
+    ):
+        grouped.setdefault((row[0], row[1]), []).append(
+            {
+                "is_correct": row[2],
+                "difficulty": row[3],
+                "time_taken": row[4],
+                "expected_time": row[5],
+                "attempts": row[6],
+            }
+        )
+    return {key: compute_subconcept_mastery(items) for key, items in grouped.items()}
+
+
+def main() -> None:
+    """Time both engines on the same data and check they agree."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--responses", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    columns = _generate(args.responses, args.users, args.seed)
+
+    started = time.perf_counter()
+    scalar = _scalar(columns)
+    scalar_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = compute_mastery_batch(**columns)
+    batch_seconds = time.perf_counter() - started
+
+    user_labels, user_codes = np.unique(columns["user_ids"], return_inverse=True)
+    sub_labels, sub_codes = np.unique(columns["sub_concepts"], return_inverse=True)
+    coded = {**columns, "user_ids": user_codes, "sub_concepts": sub_codes}
+    started = time.perf_counter()
+    coded_batch = compute_mastery_batch(**coded)
+    coded_seconds = time.perf_counter() - started
+    assert np.array_equal(
+        user_labels[coded_batch["user_id"]], batch["user_id"]
+    ) and np.array_equal(sub_labels[coded_batch["sub_concept"]], batch["sub_concept"])
+
+    max_error = 0.0
+    for row in range(len(batch["total_attempts"])):
+        key = (str(batch["user_id"][row]), str(batch["sub_concept"][row]))
+        expected = scalar[key]["mastery_score"]
+        actual = batch["mastery_score"][row]
+        if expected is None:
+            assert np.isnan(actual), key
+            continue
+        max_error = max(max_error, abs(expected - actual))
+    assert len(scalar) == len(batch["total_attempts"])
+    assert max_error <= 1e-9, max_error
+
+    print(f"responses:      {args.responses}")
+    print(f"pairs:          {len(scalar)}")
+    print(f"scalar engine:  {scalar_seconds:.3f}s")
+    print(f"batch engine:   {batch_seconds:.3f}s")
+    print(f"batch (coded):  {coded_seconds:.3f}s")
+    print(f"speedup:        {scalar_seconds / batch_seconds:.1f}x")
+    print(f"speedup coded:  {scalar_seconds / coded_seconds:.1f}x")
+    print(f"max abs error:  {max_error:.3e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark serving quizzes from pre-assembled pools against assembling per request.
+
+Uses question_master.json directly, so no database is needed. Run from the
+backend directory:
+
+    python -m benchmarks.bench_quiz_pool --requests 20000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from services.question_catalog import QuestionCatalog
+from services.quiz_assembler import QuizAssembler
+from services.quiz_pools import QuizPool
+
+QUESTION_MASTER = Path(__file__).resolve().parents[2] / "question_master.json"
+PLANS = [
+    [],
+    [("DFS", 2, 1, 0, 3), ("Kadane", 2, 1, 1, 4), ("Memoization", 1, 1, 1, 3)],
+    [("Sliding Window", 4, 2, 0, 6), ("BFS", 2, 1, 1, 4)],
+]
+
+
+async def _measure(serve: Callable[..., List], requests: List[Tuple]) -> List[float]:
+    samples = []
+    for request in requests:
+        started = time.perf_counter()
+        serve(*request)
+        samples.append((time.perf_counter() - started) * 1_000_000.0)
+        # Let scheduled refills run between requests, as they would between
+        # requests on a live event loop.
+        await asyncio.sleep(0)
+    return sorted(samples)
+
+
+async def main() -> None:
+    """Report per-request serving latency for both strategies."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--exclude", type=int, default=50, help="Recently answered questions per user")
+    args = parser.parse_args()
+
+    catalog = QuestionCatalog()
+    catalog.index(json.loads(QUESTION_MASTER.read_text(encoding="utf-8")), version=1)
+    rng = random.Random(3)
+    question_ids = [question["question_id"] for question in catalog.questions]
+    pool = QuizPool(rng=random.Random(4))
+    pool.warm(catalog, [tuple(plan) for plan in PLANS])
+
+    requests = [
+        (rng.choice(PLANS), set(rng.sample(question_ids, min(args.exclude, len(question_ids)))))
+        for _ in range(args.requests)
+    ]
+
+    def assembled(plan, exclude):
+        return QuizAssembler(catalog, rng, exclude).assemble(plan)
+
+    def pooled(plan, exclude):
+        return pool.serve(catalog, plan, exclude)
+
+    print(f"{'strategy':12} {'p50 us':>8} {'p99 us':>8}")
+    for name, serve in (("assembled", assembled), ("pooled", pooled)):
+        samples = await _measure(serve, requests)
+        p99 = samples[int(len(samples) * 0.99) - 1]
+        print(f"{name:12} {statistics.median(samples):8.1f} {p99:8.1f}")
+    print(f"pool stats: {pool.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
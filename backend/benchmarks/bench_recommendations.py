@@ -0,0 +1,112 @@
+"""Latency benchmark for recommendation lookups against a local mongod.
+
+Seeds question_master.json into a scratch database and compares the
+original serial per-bucket finds, the same finds issued concurrently, the
+single grouped aggregation, and the in-process catalog. Run from the
+backend directory:
+
+    python -m benchmarks.bench_recommendations --uri mongodb://localhost:27017
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from indexes import ensure_indexes
+from services.question_catalog import QuestionCatalog
+from services.recommendation_engine import (
+    PRACTICE_LIMITS,
+    generate_recommendations,
+    generate_recommendations_from_db,
+)
+
+QUESTION_MASTER = Path(__file__).resolve().parents[2] / "question_master.json"
+WEAK_AREAS = [
+    {"sub_concept": "DFS", "mastery_score": 21.0, "status": "Critical"},
+    {"sub_concept": "Kadane", "mastery_score": 48.0, "status": "Weak"},
+    {"sub_concept": "Memoization", "mastery_score": 66.0, "status": "Moderate"},
+]
+
+
+async def _serial(db) -> List[Dict]:
+    recommendations = []
+    for area in WEAK_AREAS:
+        practice = {}
+        for label, (difficulty, limit) in PRACTICE_LIMITS.items():
+            practice[label] = await db.questions.find(
+                {"sub_concept": area["sub_concept"], "difficulty": difficulty},
+                {"_id": 0},
+            ).to_list(length=limit)
+        recommendations.append(practice)
+    return recommendations
+
+
+async def _gathered(db) -> List[Dict]:
+    lookups = [
+        db.questions.find(
+            {"sub_concept": area["sub_concept"], "difficulty": difficulty}, {"_id": 0}
+        ).to_list(length=limit)
+        for area in WEAK_AREAS
+        for difficulty, limit in PRACTICE_LIMITS.values()
+    ]
+    return await asyncio.gather(*lookups)
+
+
+async def _measure(run: Callable[[], Awaitable], iterations: int) -> List[float]:
+    await run()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await run()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return samples
+
+
+async def main() -> None:
+    """Seed a scratch database and report latency for each strategy."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="dsa_benchmark")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(args.uri)
+    db = client[args.database]
+    await db.questions.delete_many({})
+    await db.questions.insert_many(json.loads(QUESTION_MASTER.read_text(encoding="utf-8")))
+    await ensure_indexes(db)
+
+    catalog = QuestionCatalog()
+    await catalog.load(db)
+
+    async def from_catalog():
+        return generate_recommendations(WEAK_AREAS, catalog)
+
+    strategies = {
+        "serial finds": lambda: _serial(db),
+        "gathered finds": lambda: _gathered(db),
+        "grouped aggregation": lambda: generate_recommendations_from_db(WEAK_AREAS, db),
+        "in-process catalog": from_catalog,
+    }
+
+    grouped = await generate_recommendations_from_db(WEAK_AREAS, db)
+    assert grouped == generate_recommendations(WEAK_AREAS, catalog)
+
+    print(f"{'strategy':22} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, run in strategies.items():
+        samples = sorted(await _measure(run, args.iterations))
+        p95 = samples[int(len(samples) * 0.95) - 1]
+        print(f"{name:22} {statistics.median(samples):8.3f} {p95:8.3f}")
+
+    await client.drop_database(args.database)
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""Memory benchmark for holding a response history as dicts versus columns.
+
+Loads one user's history through the same in-process Motor stand-in as
+bench_streaming_memory, once as the merged dict list returned by
+`load_merged_history` and once as `ResponseColumns`. It reports the memory
+retained per response and the time to replay each representation through
+the Elo scorer, which reads columns for users without stored abilities.
+Run from the backend directory:
+
+    python -m benchmarks.bench_response_columns --sizes 10000 100000 1000000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from benchmarks.bench_streaming_memory import QUESTION_MASTER, USER_ID, _Collection
+from services.ability_scoring import empty_ability, group_abilities_from_columns, update_ability
+from services.mastery_state import load_merged_history
+from services.question_catalog import QuestionCatalog
+from services.response_columns import load_response_columns
+
+
+def _retained(load: Callable[[], Awaitable[Any]]) -> Tuple[Any, int]:
+    """Return the loaded history and the bytes it keeps alive."""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    history = asyncio.run(load())
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return history, after - before
+
+
+def _group_abilities(merged: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    grouped: Dict[str, Dict[str, Any]] = {}
+    for response in merged:
+        sub_concept = response.get("sub_concept")
+        if not sub_concept:
+            continue
+        state = grouped.get(sub_concept)
+        if state is None:
+            state = grouped[sub_concept] = empty_ability()
+        update_ability(state, response)
+    return grouped
+
+
+def main() -> None:
+    """Report bytes per response and scoring time for both representations."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    catalog = QuestionCatalog()
+    catalog.index(json.loads(QUESTION_MASTER.read_text(encoding="utf-8")), None)
+    question_ids = list(catalog.by_id)
+
+    print(f"{'responses':>10} {'layout':>8} {'bytes/resp':>11} {'score s':>8}")
+    for size in args.sizes:
+        db = {"user_responses": _Collection(size, question_ids)}
+
+        merged, merged_bytes = _retained(lambda: load_merged_history(db, USER_ID, catalog))
+        started = time.perf_counter()
+        merged_states = _group_abilities(merged)
+        merged_seconds = time.perf_counter() - started
+        del merged
+
+        columns, column_bytes = _retained(lambda: load_response_columns(db, USER_ID, catalog))
+        started = time.perf_counter()
+        column_states = group_abilities_from_columns(columns, catalog.questions)
+        column_seconds = time.perf_counter() - started
+        assert column_states == merged_states
+
+        print(f"{size:>10} {'dicts':>8} {merged_bytes / size:11.1f} {merged_seconds:8.2f}")
+        print(f"{size:>10} {'columns':>8} {column_bytes / size:11.1f} {column_seconds:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Benchmark small-request tail latency while large histories are scored.
+
+Small histories arrive at a fixed rate while a few large ones are scored
+concurrently, using the Elo replay that serves users without stored ability
+state. Small-request latency is measured from the scheduled arrival time,
+so time spent waiting for a blocked event loop counts. The benchmark runs
+once with everything inline and once with large histories offloaded to the
+process pool. It uses question_master.json directly, so no database is
+needed. Run from the backend directory:
+
+    python -m benchmarks.bench_scoring_offload --large-size 1000000 --large-count 4
+"""
+
+import argparse
+import asyncio
+import json
+import pickle
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from services.ability_scoring import group_abilities_from_columns
+from services.question_catalog import QuestionCatalog
+from services.response_columns import ResponseColumns
+from services.scoring_executor import ScoringExecutor
+
+QUESTION_MASTER = Path(__file__).resolve().parents[2] / "question_master.json"
+
+
+def _history(size: int, questions: int, rng: random.Random) -> ResponseColumns:
+    columns = ResponseColumns()
+    for _ in range(size):
+        columns.append(rng.randrange(questions), rng.random() < 0.6, rng.randint(10, 180), 1)
+    return columns
+
+
+async def _small_requests(
+    executor: ScoringExecutor,
+    catalog: QuestionCatalog,
+    small: ResponseColumns,
+    interval: float,
+    stop: asyncio.Event,
+) -> List[float]:
+    latencies = []
+    started = time.perf_counter()
+    arrival = 0
+    while not stop.is_set():
+        due = started + arrival * interval
+        await asyncio.sleep(max(due - time.perf_counter(), 0))
+        await executor.score(group_abilities_from_columns, small, catalog)
+        latencies.append((time.perf_counter() - due) * 1000.0)
+        arrival += 1
+    return latencies
+
+
+async def _run(
+    executor: ScoringExecutor,
+    catalog: QuestionCatalog,
+    large: List[ResponseColumns],
+    small: ResponseColumns,
+    interval: float,
+) -> Dict[str, float]:
+    stop = asyncio.Event()
+    small_task = asyncio.create_task(_small_requests(executor, catalog, small, interval, stop))
+
+    async def score_large(columns: ResponseColumns) -> None:
+        # Stagger arrivals so large requests do not all start at once.
+        await asyncio.sleep(interval * 10 * large.index(columns))
+        await executor.score(group_abilities_from_columns, columns, catalog)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(score_large(columns) for columns in large))
+    large_seconds = time.perf_counter() - started
+    stop.set()
+    latencies = sorted(await small_task)
+    return {
+        "small_p50_ms": statistics.median(latencies),
+        "small_p99_ms": latencies[max(int(len(latencies) * 0.99) - 1, 0)],
+        "small_max_ms": latencies[-1],
+        "large_s": large_seconds,
+    }
+
+
+async def main() -> None:
+    """Report small-request latency percentiles for inline and offloaded scoring."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--large-size", type=int, default=1_000_000)
+    parser.add_argument("--large-count", type=int, default=4)
+    parser.add_argument("--small-size", type=int, default=200)
+    parser.add_argument("--interval-ms", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threshold", type=int, default=20000)
+    args = parser.parse_args()
+
+    catalog = QuestionCatalog()
+    catalog.index(json.loads(QUESTION_MASTER.read_text(encoding="utf-8")), version=1)
+    rng = random.Random(7)
+    large = [_history(args.large_size, len(catalog.questions), rng) for _ in range(args.large_count)]
+    small = _history(args.small_size, len(catalog.questions), rng)
+    payload = len(pickle.dumps(large[0], protocol=pickle.HIGHEST_PROTOCOL))
+    print(f"large history payload: {payload / args.large_size:.1f} bytes/response")
+
+    interval = args.interval_ms / 1000.0
+    print(f"{'strategy':10} {'small p50 ms':>13} {'small p99 ms':>13} {'small max ms':>13} {'large s':>8}")
+    for name, workers in (("inline", 0), ("offload", args.workers)):
+        executor = ScoringExecutor(threshold=args.threshold, workers=workers)
+        if workers:
+            # Start the worker processes outside the measurement.
+            await executor.score(group_abilities_from_columns, large[0], catalog)
+        result = await _run(executor, catalog, large, small, interval)
+        executor.shutdown()
+        print(
+            f"{name:10} {result['small_p50_ms']:13.2f} {result['small_p99_ms']:13.2f}"
+            f" {result['small_max_ms']:13.2f} {result['large_s']:8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""Startup benchmark: import time and time to first successful request.
+
+Each run starts a fresh interpreter, so nothing is cached between runs. The
+import probe times `import main` alone. The serve probe launches uvicorn
+against MONGO_URI/DATABASE_NAME, polls /ready, and times the first
+successful GET /quiz. Run from the backend directory with a database
+reachable:
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Optional
+
+BACKEND = Path(__file__).resolve().parents[1]
+IMPORT_PROBE = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _get(url: str) -> Optional[int]:
+    try:
+        with urllib.request.urlopen(url, timeout=1.0) as response:
+            return response.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+    except OSError:
+        return None
+
+
+def time_import() -> float:
+    """Return the seconds taken to import the app in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        cwd=BACKEND,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def time_first_request(timeout: float) -> dict:
+    """Launch the app and return seconds until /ready and the first quiz."""
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND,
+        env=os.environ.copy(),
+    )
+    try:
+        ready = None
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise SystemExit(f"uvicorn exited with status {server.returncode}")
+            if ready is None and _get(f"{base}/ready") == 200:
+                ready = time.perf_counter() - started
+            if ready is not None and _get(f"{base}/quiz") == 200:
+                return {"ready_s": ready, "first_quiz_s": time.perf_counter() - started}
+            time.sleep(0.01)
+        raise SystemExit(f"no successful request within {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    """Report the median import, readiness and first-request times."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--import-only", action="store_true", help="Skip launching the server")
+    args = parser.parse_args()
+
+    results = {"import_s": statistics.median(time_import() for _ in range(args.runs))}
+    if not args.import_only:
+        runs = [time_first_request(args.timeout) for _ in range(args.runs)]
+        results["ready_s"] = statistics.median(run["ready_s"] for run in runs)
+        results["first_quiz_s"] = statistics.median(run["first_quiz_s"] for run in runs)
+    print(json.dumps({name: round(value, 3) for name, value in results.items()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Peak-memory benchmark for list-based versus streamed history scoring.
+
+Drives the real service code with an in-process stand-in for a Motor
+collection that generates BSON-like response documents on demand and, like
+Motor, buffers one cursor batch at a time. Run from the backend directory:
+
+    python -m benchmarks.bench_streaming_memory --sizes 10000 100000 1000000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from bson import ObjectId
+
+from services.mastery_state import group_totals, load_merged_history
+from services.question_catalog import QuestionCatalog
+from services.response_stats import stream_subconcept_totals
+
+QUESTION_MASTER = Path(__file__).resolve().parents[2] / "question_master.json"
+USER_ID = "3fa85f64-5717-4562-b3fc-2c963f66afa6"
+
+
+class _Cursor:
+    def __init__(self, documents: Iterator[Dict[str, Any]], projection: Optional[Dict]) -> None:
+        self._documents = documents
+        self._projection = projection
+        self._batch_size = 101
+        self._buffer: List[Dict[str, Any]] = []
+
+    def sort(self, *_: Any) -> "_Cursor":
+        return self
+
+    def batch_size(self, size: int) -> "_Cursor":
+        self._batch_size = size
+        return self
+
+    def _project(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        if not self._projection:
+            return document
+        if self._projection.get("_id") == 0 and len(self._projection) == 1:
+            return {key: value for key, value in document.items() if key != "_id"}
+        return {key: document[key] for key, keep in self._projection.items() if keep and key in document}
+
+    def __aiter__(self) -> "_Cursor":
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        if not self._buffer:
+            self._buffer = [self._project(document) for _, document in zip(range(self._batch_size), self._documents)]
+            self._buffer.reverse()
+            if not self._buffer:
+                raise StopAsyncIteration
+        return self._buffer.pop()
+
+    async def to_list(self, _: Optional[int]) -> List[Dict[str, Any]]:
+        return [self._project(document) for document in self._documents]
+
+
+class _Collection:
+    def __init__(self, size: int, question_ids: List[str]) -> None:
+        self.size = size
+        self.question_ids = question_ids
+
+    def _generate(self) -> Iterator[Dict[str, Any]]:
+        rng = random.Random(11)
+        started = datetime(2024, 1, 1)
+        for index in range(self.size):
+            yield {
+                "_id": ObjectId(),
+                "user_id": USER_ID,
+                "question_id": rng.choice(self.question_ids),
+                "is_correct": rng.random() < 0.6,
+                "time_taken": rng.randint(10, 150),
+                "attempts": 1,
+                "timestamp": started + timedelta(minutes=index),
+            }
+
+    def find(self, _: Dict[str, Any], projection: Optional[Dict] = None) -> _Cursor:
+        return _Cursor(self._generate(), projection)
+
+
+def _peak(run) -> tuple:
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, elapsed
+
+
+def main() -> None:
+    """Report peak traced memory and wall time for both modes at each size."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    catalog = QuestionCatalog()
+    catalog.index(json.loads(QUESTION_MASTER.read_text(encoding="utf-8")), None)
+    question_ids = list(catalog.by_id)
+
+    print(f"{'responses':>10} {'mode':>7} {'peak MiB':>9} {'seconds':>8}")
+    for size in args.sizes:
+        db = {"user_responses": _Collection(size, question_ids)}
+
+        async def listed():
+            return group_totals(await load_merged_history(db, USER_ID, catalog))
+
+        async def streamed():
+            return await stream_subconcept_totals(db, USER_ID, catalog, args.batch_size)
+
+        listed_totals, listed_peak, listed_seconds = _peak(listed)
+        streamed_totals, streamed_peak, streamed_seconds = _peak(streamed)
+        assert listed_totals == streamed_totals
+
+        print(f"{size:>10} {'list':>7} {listed_peak / 2**20:9.1f} {listed_seconds:8.2f}")
+        print(f"{size:>10} {'stream':>7} {streamed_peak / 2**20:9.1f} {streamed_seconds:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
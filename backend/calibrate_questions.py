@@ -0,0 +1,246 @@
+"""Calibrate question difficulty and expected time from observed responses.
+
+Scans user_responses in chunks, fits an Elo/Rasch-style rating per question
+and per user with vectorized mini-batch updates, and tracks per-question time
+histograms for median/p90 estimates. Calibrated values are recorded in
+question_calibrations under a new version and, unless --dry-run is given,
+written back to the questions collection.
+"""
+
+import argparse
+import asyncio
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from services.question_catalog import QuestionCatalog, bump_catalog_version
+
+CALIBRATION_COLLECTION = "question_calibrations"
+MAX_TRACKED_SECONDS = 1800
+USER_LEARNING_RATE = 0.4
+QUESTION_LEARNING_RATE = 0.2
+
+
+class Calibrator:
+    """Streaming estimator whose memory is bounded by questions and users, not responses."""
+
+    def __init__(self, question_ids: List[str]) -> None:
+        self.question_index = {question_id: index for index, question_id in enumerate(question_ids)}
+        self.question_ratings = np.zeros(len(question_ids))
+        self.question_counts = np.zeros(len(question_ids), dtype=np.int64)
+        self.time_histogram = np.zeros((len(question_ids), MAX_TRACKED_SECONDS + 1), dtype=np.int64)
+        self.user_index: Dict[str, int] = {}
+        self.user_ratings = np.zeros(1024)
+
+    def _user_codes(self, user_ids: List[str]) -> np.ndarray:
+        codes = np.fromiter(
+            (self.user_index.setdefault(user_id, len(self.user_index)) for user_id in user_ids),
+            dtype=np.int64,
+            count=len(user_ids),
+        )
+        if len(self.user_index) > len(self.user_ratings):
+            grown = np.zeros(max(len(self.user_index), 2 * len(self.user_ratings)))
+            grown[: len(self.user_ratings)] = self.user_ratings
+            self.user_ratings = grown
+        return codes
+
+    def update(self, chunk: List[Dict[str, Any]], track_times: bool) -> None:
+        """Apply one vectorized rating step for a chunk of responses."""
+        rows = [
+            (self.question_index[response["question_id"]], response)
+            for response in chunk
+            if response.get("question_id") in self.question_index
+        ]
+        if not rows:
+            return
+        questions = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        users = self._user_codes([row[1].get("user_id") for row in rows])
+        correct = np.fromiter(
+            (bool(row[1].get("is_correct")) for row in rows), dtype=np.float64, count=len(rows)
+        )
+
+        expected = 1.0 / (1.0 + np.exp(self.question_ratings[questions] - self.user_ratings[users]))
+        residual = correct - expected
+
+        question_total = len(self.question_ratings)
+        question_hits = np.bincount(questions, minlength=question_total)
+        question_step = np.bincount(questions, weights=residual, minlength=question_total)
+        seen = question_hits > 0
+        self.question_ratings[seen] -= QUESTION_LEARNING_RATE * question_step[seen] / question_hits[seen]
+
+        user_total = len(self.user_index)
+        user_hits = np.bincount(users, minlength=user_total)
+        user_step = np.bincount(users, weights=residual, minlength=user_total)
+        active = user_hits > 0
+        self.user_ratings[:user_total][active] += USER_LEARNING_RATE * user_step[active] / user_hits[active]
+
+        if track_times:
+            self.question_counts += question_hits
+            seconds = np.fromiter(
+                (int(row[1].get("time_taken", 0)) for row in rows), dtype=np.int64, count=len(rows)
+            )
+            np.add.at(self.time_histogram, (questions, np.clip(seconds, 0, MAX_TRACKED_SECONDS)), 1)
+
+    def time_quantile(self, index: int, fraction: float) -> Optional[int]:
+        counts = self.time_histogram[index]
+        total = counts.sum()
+        if not total:
+            return None
+        return int(np.searchsorted(np.cumsum(counts), fraction * total))
+
+
+async def scan(db, calibrator: Calibrator, chunk_size: int, epochs: int) -> int:
+    """Stream every response through the calibrator, returning the response count."""
+    projection = {"_id": 0, "user_id": 1, "question_id": 1, "is_correct": 1, "time_taken": 1}
+    total = 0
+    for epoch in range(epochs):
+        chunk: List[Dict[str, Any]] = []
+        cursor = db["user_responses"].find({}, projection).sort("_id", 1).batch_size(chunk_size)
+        async for response in cursor:
+            chunk.append(response)
+            if len(chunk) >= chunk_size:
+                calibrator.update(chunk, track_times=epoch == 0)
+                total += len(chunk) if epoch == 0 else 0
+                chunk = []
+        if chunk:
+            calibrator.update(chunk, track_times=epoch == 0)
+            total += len(chunk) if epoch == 0 else 0
+    return total
+
+
+def calibrated_values(
+    catalog: QuestionCatalog, calibrator: Calibrator, min_responses: int
+) -> List[Dict[str, Any]]:
+    """Map fitted ratings and time quantiles to catalog fields.
+
+    Difficulty levels are assigned by rating rank so each level keeps the
+    same number of questions it had before calibration.
+    """
+    ratings = calibrator.question_ratings - calibrator.question_ratings.mean()
+    eligible = [
+        question
+        for question in catalog.questions
+        if calibrator.question_counts[calibrator.question_index[question["question_id"]]] >= min_responses
+    ]
+    level_sizes = sorted(int(question.get("difficulty", 0)) for question in eligible)
+    ranked = sorted(eligible, key=lambda question: ratings[calibrator.question_index[question["question_id"]]])
+
+    results = []
+    for level, question in zip(level_sizes, ranked):
+        index = calibrator.question_index[question["question_id"]]
+        median = calibrator.time_quantile(index, 0.5)
+        results.append(
+            {
+                "question_id": question["question_id"],
+                "previous": {
+                    "difficulty": question.get("difficulty"),
+                    "expected_time": question.get("expected_time"),
+                },
+                "difficulty": level,
+                "difficulty_rating": float(ratings[index]),
+                "expected_time": max(1, median) if median is not None else question.get("expected_time"),
+                "time_p90": calibrator.time_quantile(index, 0.9),
+                "responses": int(calibrator.question_counts[index]),
+            }
+        )
+    return results
+
+
+async def calibrate(
+    db, chunk_size: int, epochs: int, min_responses: int, dry_run: bool
+) -> List[Dict[str, Any]]:
+    """Fit, record, and optionally apply a new calibration version."""
+    catalog = QuestionCatalog()
+    await catalog.load(db)
+    calibrator = Calibrator([question["question_id"] for question in catalog.questions])
+
+    responses = await scan(db, calibrator, chunk_size, epochs)
+    results = calibrated_values(catalog, calibrator, min_responses)
+    print(f"Scanned {responses} responses, calibrated {len(results)} questions")
+    for result in results:
+        previous = result["previous"]
+        print(
+            f"{result['question_id']:>12}  difficulty {previous['difficulty']} -> {result['difficulty']}"
+            f"  rating {result['difficulty_rating']:+.2f}"
+            f"  expected_time {previous['expected_time']} -> {result['expected_time']}"
+            f"  p90 {result['time_p90']}  n={result['responses']}"
+        )
+
+    if dry_run or not results:
+        return results
+
+    latest = await db[CALIBRATION_COLLECTION].find_one(sort=[("version", -1)])
+    version = (latest or {}).get("version", 0) + 1
+    now = datetime.utcnow()
+    await db[CALIBRATION_COLLECTION].insert_many(
+        [{**result, "version": version, "created_at": now} for result in results]
+    )
+    await db["questions"].bulk_write(
+        [
+            UpdateOne(
+                {"question_id": result["question_id"]},
+                {
+                    "$set": {
+                        "difficulty": result["difficulty"],
+                        "expected_time": result["expected_time"],
+                        "difficulty_rating": result["difficulty_rating"],
+                        "time_p90": result["time_p90"],
+                        "calibration_version": version,
+                    }
+                },
+            )
+            for result in results
+        ],
+        ordered=False,
+    )
+    await bump_catalog_version(db)
+    print(f"Applied calibration version {version}")
+    return results
+
+
+async def main() -> None:
+    """Connect to MongoDB and calibrate the question catalog."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--epochs", type=int, default=2)
+    parser.add_argument("--min-responses", type=int, default=30)
+    parser.add_argument("--dry-run", action="store_true", help="Report without writing")
+    parser.add_argument(
+        "--rebuild-state",
+        action="store_true",
+        help="Recompute mastery state and daily rollups with the new values",
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    mongo_uri = os.getenv("MONGO_URI")
+    database_name = os.getenv("DATABASE_NAME")
+    if not mongo_uri or not database_name:
+        raise ValueError("MONGO_URI and DATABASE_NAME must be set")
+
+    client = AsyncIOMotorClient(mongo_uri)
+    db = client[database_name]
+
+    results = await calibrate(db, args.chunk_size, args.epochs, args.min_responses, args.dry_run)
+
+    if results and not args.dry_run:
+        # Stored sums embed the difficulty and expected time seen at submit time.
+        if args.rebuild_state:
+            from backfill_rollups import backfill
+            from rebuild_mastery_state import rebuild
+
+            await rebuild(db)
+            await backfill(db)
+        else:
+            print("Run rebuild_mastery_state.py and backfill_rollups.py to rescore history")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+"""Runtime configuration read from the environment."""
+
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGO_URI")
+DATABASE_NAME = os.getenv("DATABASE_NAME")
+# Connections opened during startup so first requests skip the handshakes.
+MONGO_WARM_CONNECTIONS = int(os.getenv("MONGO_WARM_CONNECTIONS", "10"))
+# Startup warmup attempts, and the delay before the first retry (doubled
+# after each failure, up to WARMUP_RETRY_MAX_SECONDS).
+WARMUP_ATTEMPTS = int(os.getenv("WARMUP_ATTEMPTS", "5"))
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "1"))
+WARMUP_RETRY_MAX_SECONDS = float(os.getenv("WARMUP_RETRY_MAX_SECONDS", "30"))
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+SUBMIT_BUFFER_ENABLED = _env_flag("SUBMIT_BUFFER_ENABLED")
+SUBMIT_BUFFER_MAX_BATCH = int(os.getenv("SUBMIT_BUFFER_MAX_BATCH", "500"))
+SUBMIT_BUFFER_MAX_DELAY_MS = int(os.getenv("SUBMIT_BUFFER_MAX_DELAY_MS", "20"))
+
+ANALYTICS_CACHE_BACKEND = os.getenv("ANALYTICS_CACHE_BACKEND", "memory").strip().lower()
+ANALYTICS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", "10000"))
+ANALYTICS_CACHE_TTL_SECONDS = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "300"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# How to score users without stored mastery state: "pipeline" aggregates in
+# MongoDB, "stream" loads the history as compact columns and folds it in the
+# scoring process pool (inline below SCORING_OFFLOAD_THRESHOLD responses).
+HISTORY_TOTALS_MODE = os.getenv("HISTORY_TOTALS_MODE", "pipeline").strip().lower()
+
+COHORT_REFRESH_SECONDS = float(os.getenv("COHORT_REFRESH_SECONDS", "3600"))
+
+# Which scorer serves mastery reads: "weighted" (the blended formula) or
+# "elo" (online ability estimates kept in user_ability_state).
+SCORING_MODE = os.getenv("SCORING_MODE", "weighted").strip().lower()
+
+# Per-request Server-Timing headers and the /metrics endpoint.
+INSTRUMENTATION_ENABLED = _env_flag("INSTRUMENTATION_ENABLED", True)
+
+# Pre-assembled quizzes kept per allocation plan (0 disables pooling), the
+# number of plans kept, and how many recent answers a quiz avoids repeating.
+QUIZ_POOL_SIZE = int(os.getenv("QUIZ_POOL_SIZE", "16"))
+QUIZ_POOL_MAX_PROFILES = int(os.getenv("QUIZ_POOL_MAX_PROFILES", "1024"))
+QUIZ_EXCLUDE_RECENT = int(os.getenv("QUIZ_EXCLUDE_RECENT", "50"))
+
+# GET /export/{kind} streams every user's responses or mastery; keep it off
+# unless the deployment restricts who can reach it.
+EXPORT_ENDPOINT_ENABLED = _env_flag("EXPORT_ENDPOINT_ENABLED")
+
+# Histories with at least this many responses are scored in a pool of
+# SCORING_PROCESS_WORKERS processes instead of on the event loop (0 workers
+# scores everything inline).
+SCORING_OFFLOAD_THRESHOLD = int(os.getenv("SCORING_OFFLOAD_THRESHOLD", "20000"))
+SCORING_PROCESS_WORKERS = int(os.getenv("SCORING_PROCESS_WORKERS", "2"))
+
+# Response compression: "gzip", "brotli" (needs brotli-asgi; falls back to
+# gzip for clients without br) or "off". Smaller bodies are sent as is.
+COMPRESSION = os.getenv("COMPRESSION", "gzip").strip().lower()
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1000"))
@@ -19,3 +19,19 @@ CONSISTENCY_WEIGHT = 0.1
 CRITICAL_THRESHOLD = 40
 WEAK_THRESHOLD = 60
 MODERATE_THRESHOLD = 80
+
+MASTERY_HALF_LIFE_DAYS = 30.0
+
+# Online ability (Elo/Rasch) scoring. Abilities and question ratings share a
+# logit scale; uncalibrated questions are rated by their difficulty level.
+ELO_INITIAL_ABILITY = 0.0
+ELO_K_FACTOR = 0.6
+ELO_K_DECAY = 0.05
+DIFFICULTY_RATINGS: Dict[int, float] = {1: -1.0, 2: 0.0, 3: 1.0}
+
+# SM-2 spaced repetition. Answers are graded 0-5 from correctness and speed;
+# grades below REVIEW_PASSING_GRADE restart a question's interval.
+REVIEW_INITIAL_EASE = 2.5
+REVIEW_MIN_EASE = 1.3
+REVIEW_PASSING_GRADE = 3
+REVIEW_FAILED_GRADE = 1
@@ -1,14 +1,56 @@
+"""MongoDB client lifecycle.
+
+The client is created on first use (normally by the app lifespan) rather
+than at import time, so importing the app stays cheap and scripts can point
+it at another deployment before connecting.
+"""
+
+import asyncio
+from typing import Iterable, Optional
+
 from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
-import os
+from pymongo import monitoring
+
+from config import DATABASE_NAME, MONGO_URI, MONGO_WARM_CONNECTIONS
+from services.instrumentation import command_listeners
+
+_client: Optional[AsyncIOMotorClient] = None
+_database = None
 
-load_dotenv()
 
-MONGO_URI = os.getenv("MONGO_URI")
-DATABASE_NAME = os.getenv("DATABASE_NAME")
+def connect(
+    uri: Optional[str] = None,
+    database_name: Optional[str] = None,
+    event_listeners: Iterable[monitoring.CommandListener] = (),
+):
+    """Create the shared client if needed and return the application database."""
+    global _client, _database
+    if _database is None:
+        name = database_name or DATABASE_NAME
+        if not name:
+            raise RuntimeError("DATABASE_NAME must be set")
+        _client = AsyncIOMotorClient(
+            uri or MONGO_URI,
+            event_listeners=[*command_listeners(), *event_listeners],
+        )
+        _database = _client[name]
+    return _database
 
-client = AsyncIOMotorClient(MONGO_URI)
-database = client[DATABASE_NAME]
 
 def get_database():
-    return database
\ No newline at end of file
+    return connect()
+
+
+async def warm_connections(count: int = MONGO_WARM_CONNECTIONS) -> None:
+    """Open `count` pooled connections by issuing that many concurrent pings."""
+    database = connect()
+    await asyncio.gather(*(database.command("ping") for _ in range(max(count, 1))))
+
+
+def close() -> None:
+    """Close the shared client; the next `connect` creates a new one."""
+    global _client, _database
+    if _client is not None:
+        _client.close()
+    _client = None
+    _database = None
@@ -0,0 +1,62 @@
+"""Export user responses or per-user mastery for the data warehouse.
+
+Writes partition files and a manifest.json to the output directory. The
+default format is gzip-compressed NDJSON; Parquet needs pyarrow. Partitions
+are `_id` ranges exported concurrently. Rerunning the same command after an
+interruption resumes from the manifest. Nightly dumps of responses can use
+--since/--until, which select by insertion time:
+
+    python export_data.py responses exports/2026-10-17 --since 2026-10-17 --until 2026-10-18
+    python export_data.py mastery exports/mastery --format parquet
+"""
+
+import argparse
+import asyncio
+import os
+from datetime import datetime
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from services.exporter import EXPORT_BATCH_SIZE, EXPORT_FORMATS, EXPORT_KINDS, Exporter
+
+
+async def main() -> None:
+    """Connect to MongoDB and run one export."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=EXPORT_KINDS)
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--format", dest="file_format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Responses inserted at or after (UTC)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Responses inserted before (UTC)")
+    parser.add_argument("--partitions", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument("--restart", action="store_true", help="Discard an existing manifest and its partition files")
+    args = parser.parse_args()
+    if args.kind == "mastery" and (args.since or args.until):
+        parser.error("--since/--until only apply to responses; mastery is exported as a full snapshot")
+
+    load_dotenv()
+    mongo_uri = os.getenv("MONGO_URI")
+    database_name = os.getenv("DATABASE_NAME")
+    if not mongo_uri or not database_name:
+        raise ValueError("MONGO_URI and DATABASE_NAME must be set")
+
+    client = AsyncIOMotorClient(mongo_uri)
+    db = client[database_name]
+
+    exporter = Exporter(db, args.kind, args.out_dir, args.file_format, args.batch_size)
+    await exporter.plan(args.since, args.until, args.partitions, args.restart)
+    stats = await exporter.run(args.workers)
+    print(
+        f"Exported {stats['rows']} rows ({stats['total_rows']} total) in {stats['partitions']} partitions"
+        f" in {stats['seconds']:.1f}s, {stats['rows_per_second']:.0f} rows/s"
+    )
+
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
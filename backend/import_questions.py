@@ -0,0 +1,293 @@
+"""Import the question catalog from JSON or NDJSON files.
+
+Files are streamed, so their size is not limited by memory. Every record is
+validated against the Question model. The records are upserted in batches
+into a staging collection, which then replaces `questions` in a single
+renameCollection. Live traffic therefore sees either the old catalog or the
+new one, never a partial or empty one. The command reports the questions
+added, changed and removed, and bumps the catalog version when anything
+changed. Re-importing an unchanged file writes nothing to `questions`.
+
+    python import_questions.py ../question_master.json
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pydantic import ValidationError
+from pymongo import UpdateOne
+
+from indexes import INDEXES
+from models import Question
+from services.question_catalog import bump_catalog_version
+
+QUESTIONS_COLLECTION = "questions"
+STAGING_COLLECTION = "questions_staging"
+IMPORT_BATCH_SIZE = 1000
+READ_SIZE = 1 << 16
+MAX_REPORTED = 20
+_DELIMITERS = frozenset(",]} \t\r\n")
+
+
+def _iter_json_array(handle: TextIO, read_size: int = READ_SIZE) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array without loading the whole file.
+
+    Elements must be separated by single commas, and nothing but whitespace
+    may follow the closing bracket. Errors name the element's index and the
+    UTF-8 byte offset where it starts.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+    # What may come next: "open" is the "[", "first" an element or "]",
+    # "element" an element after a comma, "separator" a comma or "]", and
+    # "closed" only whitespace.
+    expect = "open"
+    # Elements yielded so far, and bytes of the file dropped from the buffer.
+    index, consumed = 0, 0
+
+    def offset(at: int) -> int:
+        return consumed + len(buffer[:at].encode("utf-8"))
+
+    def error(message: str, at: int) -> ValueError:
+        return ValueError(f"element {index} (byte {offset(at)}): {message}")
+
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n":
+            position += 1
+        if position < len(buffer):
+            char = buffer[position]
+            if expect == "open":
+                if char != "[":
+                    raise ValueError("expected a JSON array of questions")
+                expect = "first"
+                position += 1
+                continue
+            if expect == "closed":
+                raise error("unexpected data after the closing ']'", position)
+            if expect == "separator":
+                if char not in ",]":
+                    raise error("expected ',' or ']' after the previous element", position)
+                expect = "element" if char == "," else "closed"
+                position += 1
+                continue
+            if char == "]":
+                if expect == "element":
+                    raise error("trailing comma before ']'", position)
+                expect = "closed"
+                position += 1
+                continue
+            if char == ",":
+                raise error("expected an element, found ','", position)
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as exc:
+                # A failure followed by a delimiter cannot be fixed by reading
+                # more; anything else may be an element cut off by the chunk.
+                if eof or (
+                    not exc.msg.startswith("Unterminated string")
+                    and any(char in _DELIMITERS for char in buffer[exc.pos:])
+                ):
+                    message = exc.msg.removesuffix(" at")
+                    raise error(f"{message} at byte {offset(exc.pos)}", position) from exc
+            else:
+                # A number ending the buffer may continue in the next chunk.
+                if end < len(buffer) or eof:
+                    position = end
+                    expect = "separator"
+                    index += 1
+                    yield element
+                    continue
+        elif eof:
+            if expect == "closed":
+                return
+            raise error("unexpected end of file inside the JSON array", position)
+        chunk = handle.read(read_size)
+        if not chunk:
+            eof = True
+            continue
+        consumed = offset(position)
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def _iter_ndjson(handle: TextIO) -> Iterator[Any]:
+    for line_number, line in enumerate(handle, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"line {line_number}: {exc}") from exc
+
+
+def read_records(path: Path) -> Iterator[Any]:
+    """Yield raw records from a JSON array or NDJSON file, detected by content."""
+    with path.open(encoding="utf-8") as handle:
+        first = handle.read(1)
+        while first.isspace():
+            first = handle.read(1)
+        handle.seek(0)
+        if first == "[":
+            yield from _iter_json_array(handle)
+        else:
+            yield from _iter_ndjson(handle)
+
+
+def _fingerprint(document: Dict[str, Any]) -> bytes:
+    stored = {key: value for key, value in document.items() if key != "_id"}
+    return hashlib.sha1(json.dumps(stored, sort_keys=True, default=str).encode("utf-8")).digest()
+
+
+def _describe(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+        )
+    return str(exc)
+
+
+def _validated(record: Any) -> Dict[str, Any]:
+    """Return the document to store: the record with its Question fields coerced.
+
+    Fields outside the model, such as calibration values in an exported
+    catalog, are kept.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("record is not a JSON object")
+    question = Question.model_validate(record)
+    document = {key: value for key, value in record.items() if key != "_id"}
+    document.update(question.model_dump())
+    return document
+
+
+async def stage(
+    db, records: Iterable[Any], batch_size: int = IMPORT_BATCH_SIZE
+) -> Tuple[Dict[str, bytes], List[str]]:
+    """Validate and upsert records into the staging collection.
+
+    Returns the fingerprint of every staged question keyed by question_id
+    and a list of validation errors.
+    """
+    staging = db[STAGING_COLLECTION]
+    await staging.drop()
+    await staging.create_indexes(INDEXES[QUESTIONS_COLLECTION])
+
+    fingerprints: Dict[str, bytes] = {}
+    errors: List[str] = []
+    batch: List[UpdateOne] = []
+    for number, record in enumerate(records, 1):
+        try:
+            document = _validated(record)
+        except ValueError as exc:
+            errors.append(f"record {number}: {_describe(exc)}")
+            continue
+        question_id = document["question_id"]
+        if question_id in fingerprints:
+            errors.append(f"record {number}: duplicate question_id {question_id}")
+            continue
+        fingerprints[question_id] = _fingerprint(document)
+        batch.append(UpdateOne({"question_id": question_id}, {"$set": document}, upsert=True))
+        if len(batch) >= batch_size:
+            await staging.bulk_write(batch, ordered=False)
+            batch = []
+    if batch:
+        await staging.bulk_write(batch, ordered=False)
+    return fingerprints, errors
+
+
+async def diff(db, staged: Dict[str, bytes]) -> Dict[str, List[str]]:
+    """Compare staged fingerprints with the live collection."""
+    report: Dict[str, List[str]] = {"added": [], "changed": [], "removed": [], "unchanged": []}
+    seen = set()
+    async for document in db[QUESTIONS_COLLECTION].find({}):
+        question_id = document.get("question_id")
+        seen.add(question_id)
+        fingerprint = staged.get(question_id)
+        if fingerprint is None:
+            report["removed"].append(question_id)
+        elif fingerprint != _fingerprint(document):
+            report["changed"].append(question_id)
+        else:
+            report["unchanged"].append(question_id)
+    report["added"] = [question_id for question_id in staged if question_id not in seen]
+    return report
+
+
+async def swap(db) -> None:
+    """Replace the live collection with the staging collection atomically."""
+    await db.client.admin.command(
+        "renameCollection",
+        f"{db.name}.{STAGING_COLLECTION}",
+        to=f"{db.name}.{QUESTIONS_COLLECTION}",
+        dropTarget=True,
+    )
+
+
+async def import_catalog(
+    db,
+    records: Iterable[Any],
+    batch_size: int = IMPORT_BATCH_SIZE,
+    dry_run: bool = False,
+) -> Optional[Dict[str, List[str]]]:
+    """Stage, diff and swap in a new catalog; return the diff, or None if rejected."""
+    staged, errors = await stage(db, records, batch_size)
+    for error in errors[:MAX_REPORTED]:
+        print(error)
+    if errors:
+        print(f"Rejected: {len(errors)} invalid records")
+        await db[STAGING_COLLECTION].drop()
+        return None
+    if not staged:
+        print("Rejected: no questions to import")
+        await db[STAGING_COLLECTION].drop()
+        return None
+
+    report = await diff(db, staged)
+    print(", ".join(f"{len(ids)} {name}" for name, ids in report.items()))
+    for name in ("added", "changed", "removed"):
+        for question_id in report[name][:MAX_REPORTED]:
+            print(f"  {name:8} {question_id}")
+
+    if dry_run or not (report["added"] or report["changed"] or report["removed"]):
+        await db[STAGING_COLLECTION].drop()
+        return report
+
+    await swap(db)
+    version = await bump_catalog_version(db)
+    print(f"Swapped in {len(staged)} questions, catalog version {version}")
+    return report
+
+
+async def main() -> None:
+    """Connect to MongoDB and import question files."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paths", type=Path, nargs="+", help="JSON array or NDJSON files")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Report the diff without swapping")
+    args = parser.parse_args()
+
+    load_dotenv()
+    mongo_uri = os.getenv("MONGO_URI")
+    database_name = os.getenv("DATABASE_NAME")
+    if not mongo_uri or not database_name:
+        raise ValueError("MONGO_URI and DATABASE_NAME must be set")
+
+    client = AsyncIOMotorClient(mongo_uri)
+    db = client[database_name]
+
+    records = (record for path in args.paths for record in read_records(path))
+    report = await import_catalog(db, records, args.batch_size, args.dry_run)
+
+    client.close()
+    if report is None:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
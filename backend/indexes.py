@@ -0,0 +1,220 @@
+"""Index declarations and query-plan verification for MongoDB collections."""
+
+import argparse
+import asyncio
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Tuple
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, IndexModel
+
+from services.ability_scoring import ABILITY_STATE_COLLECTION
+from services.mastery_rollups import DAILY_ROLLUP_COLLECTION
+from services.mastery_state import MASTERY_STATE_COLLECTION
+from services.recommendation_engine import practice_questions_pipeline
+from services.response_stats import subconcept_totals_pipeline
+from services.review_schedule import REVIEW_STATE_COLLECTION
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "user_responses": [
+        IndexModel([("user_id", ASCENDING), ("timestamp", ASCENDING)], name="user_id_timestamp"),
+        IndexModel(
+            [("user_id", ASCENDING), ("submission_id", ASCENDING), ("position", ASCENDING)],
+            name="user_id_submission_id_position_unique",
+            unique=True,
+            partialFilterExpression={"submission_id": {"$exists": True}},
+        ),
+    ],
+    "questions": [
+        IndexModel([("question_id", ASCENDING)], name="question_id_unique", unique=True),
+        IndexModel(
+            [("sub_concept", ASCENDING), ("difficulty", ASCENDING)],
+            name="sub_concept_difficulty",
+        ),
+    ],
+    DAILY_ROLLUP_COLLECTION: [
+        IndexModel(
+            [("user_id", ASCENDING), ("sub_concept", ASCENDING), ("day", ASCENDING)],
+            name="user_id_sub_concept_day_unique",
+            unique=True,
+        ),
+        IndexModel([("user_id", ASCENDING), ("day", ASCENDING)], name="user_id_day"),
+    ],
+    MASTERY_STATE_COLLECTION: [
+        IndexModel(
+            [("user_id", ASCENDING), ("sub_concept", ASCENDING)],
+            name="user_id_sub_concept_unique",
+            unique=True,
+        ),
+    ],
+    ABILITY_STATE_COLLECTION: [
+        IndexModel(
+            [("user_id", ASCENDING), ("sub_concept", ASCENDING)],
+            name="user_id_sub_concept_unique",
+            unique=True,
+        ),
+    ],
+    REVIEW_STATE_COLLECTION: [
+        IndexModel(
+            [("user_id", ASCENDING), ("question_id", ASCENDING)],
+            name="user_id_question_id_unique",
+            unique=True,
+        ),
+        IndexModel([("user_id", ASCENDING), ("due_at", ASCENDING)], name="user_id_due_at"),
+    ],
+}
+
+_SAMPLE_USER = "00000000-0000-0000-0000-000000000000"
+_SAMPLE_QUESTION = "00000000-0000-0000-0000-000000000000"
+
+
+async def ensure_indexes(db) -> None:
+    """Create every declared index; existing identical indexes are left as is."""
+    await asyncio.gather(
+        *(
+            db[collection].create_indexes(models)
+            for collection, models in INDEXES.items()
+        )
+    )
+
+
+def query_shapes() -> List[Tuple[str, Dict[str, Any]]]:
+    """Return (name, explain command) for every query the routes issue."""
+    return [
+        (
+            "user responses by user, oldest first",
+            {
+                "find": "user_responses",
+                "filter": {"user_id": _SAMPLE_USER},
+                "sort": {"timestamp": 1},
+            },
+        ),
+        (
+            "recently answered questions by user",
+            {
+                "find": "user_responses",
+                "filter": {"user_id": _SAMPLE_USER},
+                "projection": {"_id": 0, "question_id": 1},
+                "sort": {"timestamp": -1},
+                "limit": 50,
+            },
+        ),
+        (
+            "per-sub-concept totals pipeline",
+            {
+                "aggregate": "user_responses",
+                "pipeline": subconcept_totals_pipeline(_SAMPLE_USER),
+                "cursor": {},
+            },
+        ),
+        (
+            "distinct users with responses",
+            {"distinct": "user_responses", "key": "user_id", "query": {}},
+        ),
+        (
+            "question by id",
+            {"find": "questions", "filter": {"question_id": {"$in": [_SAMPLE_QUESTION]}}},
+        ),
+        (
+            "questions by sub-concept and difficulty",
+            {"find": "questions", "filter": {"sub_concept": "Kadane", "difficulty": 1}},
+        ),
+        (
+            "practice questions for weak sub-concepts",
+            {
+                "aggregate": "questions",
+                "pipeline": practice_questions_pipeline(["Kadane", "DFS"]),
+                "cursor": {},
+            },
+        ),
+        (
+            "daily rollups by user and day range",
+            {
+                "find": DAILY_ROLLUP_COLLECTION,
+                "filter": {"user_id": _SAMPLE_USER, "day": {"$gte": datetime(2026, 1, 1)}},
+                "sort": {"day": 1},
+            },
+        ),
+        (
+            "mastery state by user",
+            {"find": MASTERY_STATE_COLLECTION, "filter": {"user_id": _SAMPLE_USER}},
+        ),
+        (
+            "ability state by user",
+            {"find": ABILITY_STATE_COLLECTION, "filter": {"user_id": _SAMPLE_USER}},
+        ),
+        (
+            "due reviews by user",
+            {
+                "find": REVIEW_STATE_COLLECTION,
+                "filter": {"user_id": _SAMPLE_USER, "due_at": {"$lte": datetime(2026, 1, 1)}},
+                "projection": {"_id": 0, "question_id": 1, "due_at": 1},
+                "sort": {"due_at": 1},
+                "limit": 10,
+            },
+        ),
+    ]
+
+
+def _winning_stages(explain: Any) -> Iterator[str]:
+    """Yield every stage name inside any winning plan of an explain document."""
+
+    def walk(node: Any, in_winning_plan: bool) -> Iterator[str]:
+        if isinstance(node, dict):
+            if in_winning_plan and isinstance(node.get("stage"), str):
+                yield node["stage"]
+            for key, value in node.items():
+                if key == "rejectedPlans":
+                    continue
+                yield from walk(value, in_winning_plan or key in ("winningPlan", "queryPlan"))
+        elif isinstance(node, list):
+            for item in node:
+                yield from walk(item, in_winning_plan)
+
+    return walk(explain, False)
+
+
+async def verify_query_plans(db) -> List[str]:
+    """Explain every route query shape and return the names that scan a collection."""
+    scanning = []
+    for name, command in query_shapes():
+        explain = await db.command({"explain": command, "verbosity": "queryPlanner"})
+        stages = set(_winning_stages(explain))
+        status = "COLLSCAN" if "COLLSCAN" in stages else "ok"
+        print(f"{status:8} {name}: {', '.join(sorted(stages)) or 'no plan'}")
+        if status == "COLLSCAN":
+            scanning.append(name)
+    return scanning
+
+
+async def main() -> None:
+    """Create indexes and optionally verify that no route query scans a collection."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="Run explain() on every route query shape and fail on COLLSCAN",
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    mongo_uri = os.getenv("MONGO_URI")
+    database_name = os.getenv("DATABASE_NAME")
+    if not mongo_uri or not database_name:
+        raise ValueError("MONGO_URI and DATABASE_NAME must be set")
+
+    client = AsyncIOMotorClient(mongo_uri)
+    db = client[database_name]
+
+    await ensure_indexes(db)
+    scanning = await verify_query_plans(db) if args.explain else []
+
+    client.close()
+    if scanning:
+        raise SystemExit(f"Collection scans found: {', '.join(scanning)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,10 +1,114 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
 
+import database
+from config import (
+    COHORT_REFRESH_SECONDS,
+    COMPRESSION,
+    COMPRESSION_MIN_SIZE,
+    EXPORT_ENDPOINT_ENABLED,
+    INSTRUMENTATION_ENABLED,
+    WARMUP_ATTEMPTS,
+    WARMUP_RETRY_MAX_SECONDS,
+    WARMUP_RETRY_SECONDS,
+)
+from indexes import ensure_indexes
 from routes.quiz import router as quiz_router
 from routes.analytics import router as analytics_router
+from routes.export import router as export_router
+from routes.health import router as health_router
+from routes.metrics import router as metrics_router
+from services.cohort_index import get_cohort_index, run_periodic_refresh
+from services.instrumentation import begin_request, record_request
+from services.question_catalog import get_catalog
+from services.quiz_pools import get_quiz_pool
+from services.scorers import get_scorer
+from services.scoring_executor import get_scoring_executor
+from services.submissions import get_write_buffer
+
+logger = logging.getLogger(__name__)
+
+
+async def _load_question_catalog(db) -> None:
+    """Load the question catalog and warm the anonymous quiz pool."""
+    get_quiz_pool().warm(await get_catalog(db))
+
+
+async def _warm_up(app: FastAPI, db) -> None:
+    """Warm every cache in parallel, then mark the app ready.
+
+    A failed attempt is retried with exponential backoff. Only once every
+    attempt has failed is the app marked failed, which GET /live reports.
+    """
+    started = time.perf_counter()
+    delay = WARMUP_RETRY_SECONDS
+    for attempt in range(1, WARMUP_ATTEMPTS + 1):
+        try:
+            await asyncio.gather(
+                database.warm_connections(),
+                ensure_indexes(db),
+                _load_question_catalog(db),
+                get_cohort_index().load(db),
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            if attempt == WARMUP_ATTEMPTS:
+                logger.exception("Startup warmup failed after %d attempts", attempt)
+                app.state.warmup_failed = True
+                return
+            logger.warning(
+                "Startup warmup attempt %d failed; retrying in %.1fs", attempt, delay, exc_info=True
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+            continue
+        app.state.warmup_seconds = time.perf_counter() - started
+        app.state.ready = True
+        return
+
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connect, warm every cache in the background and serve until shutdown.
+
+    Connections are accepted while warmup runs; GET /ready answers 503
+    until it has finished, and GET /live once it has given up.
+    """
+    app.state.ready = False
+    app.state.warmup_failed = False
+    db = database.connect()
+    warmup = asyncio.create_task(_warm_up(app, db))
+
+    # Keep cohort percentile distributions fresh in the background.
+    cohort_refresh = asyncio.create_task(
+        run_periodic_refresh(database.get_database, COHORT_REFRESH_SECONDS)
+    )
+    try:
+        yield
+    finally:
+        app.state.ready = False
+        warmup.cancel()
+        cohort_refresh.cancel()
+        # Flush buffered quiz submissions before the process exits.
+        write_buffer = get_write_buffer()
+        if write_buffer is not None:
+            await write_buffer.close()
+        get_scoring_executor().shutdown()
+        database.close()
+
+
+# An unknown SCORING_MODE fails here rather than on the first request.
+get_scorer()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -15,6 +119,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compression. /export streams are gzip files already and are never compressed again.
+if COMPRESSION == "brotli":
+    try:
+        from brotli_asgi import BrotliMiddleware
+    except ImportError as exc:
+        raise RuntimeError("COMPRESSION=brotli requires the brotli-asgi package") from exc
+    app.add_middleware(
+        BrotliMiddleware,
+        quality=4,
+        minimum_size=COMPRESSION_MIN_SIZE,
+        excluded_handlers=["^/export/"],
+    )
+elif COMPRESSION == "gzip":
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=COMPRESSION_MIN_SIZE,
+        compresslevel=6,
+        exclude_content_types=(*DEFAULT_EXCLUDED_CONTENT_TYPES, "application/gzip"),
+    )
+elif COMPRESSION != "off":
+    raise RuntimeError(f"Unknown COMPRESSION {COMPRESSION!r}; expected gzip, brotli or off")
+
 # Include routers
 app.include_router(quiz_router)
-app.include_router(analytics_router)
\ No newline at end of file
+app.include_router(analytics_router)
+app.include_router(health_router)
+app.include_router(metrics_router)
+if EXPORT_ENDPOINT_ENABLED:
+    app.include_router(export_router)
+
+
+if INSTRUMENTATION_ENABLED:
+
+    @app.middleware("http")
+    async def server_timing(request: Request, call_next):
+        """Report per-request stage and database timings in a Server-Timing header."""
+        timings = begin_request()
+        started = time.perf_counter()
+        response = await call_next(request)
+        elapsed = time.perf_counter() - started
+        route = request.scope.get("route")
+        record_request(
+            getattr(route, "path", "unmatched"), request.method, response.status_code, elapsed
+        )
+        response.headers["Server-Timing"] = timings.server_timing(elapsed)
+        return response
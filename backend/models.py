@@ -1,7 +1,7 @@
 """Pydantic models for the application."""
 
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -68,4 +68,58 @@ class QuizSubmissionItem(BaseModel):
 
 class QuizSubmission(BaseModel):
     user_id: str
-    responses: List[QuizSubmissionItem]
\ No newline at end of file
+    responses: List[QuizSubmissionItem]
+
+class SubConceptMastery(BaseModel):
+    status: str
+    mastery_score: Optional[float] = None
+    accuracy: Optional[float] = None
+    difficulty_weighted_accuracy: Optional[float] = None
+    time_score: Optional[float] = None
+    consistency_score: Optional[float] = None
+    ability: Optional[float] = None
+    total_attempts: Optional[int] = None
+    percentile: Optional[float] = None
+
+
+class ConceptMastery(BaseModel):
+    status: str
+    mastery_score: Optional[float] = None
+
+
+class WeakArea(BaseModel):
+    sub_concept: str
+    mastery_score: float
+    status: str
+
+
+class PracticeQuestion(BaseModel):
+    question_id: str
+    title: str
+    options: List[str]
+    correct_option: str
+    concept: str
+    sub_concept: str
+    difficulty: int
+    expected_time: int
+    difficulty_rating: Optional[float] = None
+    time_p90: Optional[int] = None
+    calibration_version: Optional[int] = None
+
+
+class Recommendation(BaseModel):
+    sub_concept: str
+    classification: Optional[str] = None
+    practice_questions: Optional[Dict[str, List[PracticeQuestion]]] = None
+    practice_question_ids: Optional[Dict[str, List[str]]] = None
+
+
+class AnalyticsResponse(BaseModel):
+    """Analytics payload; serialized with unset fields omitted."""
+
+    message: Optional[str] = None
+    overall_mastery: Optional[float] = None
+    concept_mastery: Optional[Dict[str, ConceptMastery]] = None
+    subconcept_mastery: Optional[Dict[str, SubConceptMastery]] = None
+    weak_areas: Optional[List[WeakArea]] = None
+    recommendations: Optional[List[Recommendation]] = None
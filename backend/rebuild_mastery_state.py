@@ -0,0 +1,195 @@
+"""Rebuild the user_mastery_state collection from raw user responses."""
+
+import argparse
+import asyncio
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from services.mastery_state import (
+    group_totals,
+    load_merged_history,
+    load_state,
+    rebuild_state,
+    results_from_totals,
+)
+from constants import ACCURACY_WEIGHT, CONSISTENCY_WEIGHT, DIFFICULTY_WEIGHT, TIME_WEIGHT
+from services.question_catalog import QuestionCatalog
+
+
+def _reference_mastery(responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Score one sub-concept directly from its responses, without running sums.
+
+    This is the original per-response formula, kept independent of
+    services.scoring_engine so the check below has something to compare
+    the running sums against.
+    """
+    total_attempts = len(responses)
+    if total_attempts < 3:
+        return {"status": "Insufficient Data", "mastery_score": None}
+
+    correct_count = sum(1 for response in responses if response.get("is_correct"))
+    difficulty_attempted = sum(int(response.get("difficulty", 0)) for response in responses)
+    difficulty_correct = sum(
+        int(response.get("difficulty", 0))
+        for response in responses
+        if response.get("is_correct")
+    )
+
+    accuracy = correct_count / total_attempts
+    difficulty_weighted_accuracy = (
+        difficulty_correct / difficulty_attempted if difficulty_attempted else 0.0
+    )
+
+    time_scores = []
+    for response in responses:
+        expected_time = int(response.get("expected_time", 0))
+        if expected_time <= 0:
+            continue
+        time_ratio = int(response.get("time_taken", 0)) / expected_time
+        if time_ratio <= 1:
+            time_scores.append(1.0)
+        elif time_ratio <= 2:
+            time_scores.append(1.0 - (time_ratio - 1.0))
+        else:
+            time_scores.append(0.0)
+    average_time_score = sum(time_scores) / len(time_scores) if time_scores else 0.0
+
+    avg_attempts = sum(int(response.get("attempts", 0)) for response in responses) / total_attempts
+    consistency_score = min(1.0 / avg_attempts, 1.0) if avg_attempts else 0.0
+
+    mastery = (
+        (ACCURACY_WEIGHT * accuracy)
+        + (DIFFICULTY_WEIGHT * difficulty_weighted_accuracy)
+        + (TIME_WEIGHT * average_time_score)
+        + (CONSISTENCY_WEIGHT * consistency_score)
+    )
+    return {
+        "status": "Evaluated",
+        "mastery_score": mastery * 100.0,
+        "accuracy": accuracy,
+        "difficulty_weighted_accuracy": difficulty_weighted_accuracy,
+        "time_score": average_time_score,
+        "consistency_score": consistency_score,
+        "total_attempts": total_attempts,
+    }
+
+
+def _same_result(left: Dict[str, Any], right: Dict[str, Any]) -> bool:
+    """Compare two mastery results, allowing for float summation order."""
+    if set(left) != set(right):
+        return False
+    for key, value in left.items():
+        other = right[key]
+        if isinstance(value, float) or isinstance(other, float):
+            if value is None or other is None or not math.isclose(value, other, abs_tol=1e-9):
+                return False
+        elif value != other:
+            return False
+    return True
+
+
+def _check_against_engine(
+    merged: List[Dict[str, Any]], grouped: Dict[str, Dict[str, Any]]
+) -> List[str]:
+    """Return sub-concepts whose state-derived mastery differs from the reference formula."""
+    by_sub_concept: Dict[str, List[Dict[str, Any]]] = {}
+    for item in merged:
+        sub_concept = item.get("sub_concept")
+        if not sub_concept:
+            continue
+        by_sub_concept.setdefault(sub_concept, []).append(item)
+
+    from_state = results_from_totals(grouped)
+    return [
+        sub_concept
+        for sub_concept, items in by_sub_concept.items()
+        if not _same_result(from_state.get(sub_concept, {}), _reference_mastery(items))
+    ]
+
+
+def _drifted(
+    stored: Dict[str, Dict[str, Any]], rebuilt: Dict[str, Dict[str, Any]]
+) -> List[str]:
+    """Return sub-concepts whose stored mastery differs from the rebuilt mastery."""
+    stored_results = results_from_totals(stored)
+    rebuilt_results = results_from_totals(rebuilt)
+    drifted = []
+    for sub_concept in set(stored_results) | set(rebuilt_results):
+        before = stored_results.get(sub_concept, {}).get("mastery_score")
+        after = rebuilt_results.get(sub_concept, {}).get("mastery_score")
+        if before is None or after is None:
+            if before != after:
+                drifted.append(sub_concept)
+        elif abs(before - after) > 1e-9:
+            drifted.append(sub_concept)
+    return drifted
+
+
+async def rebuild(db, user_id: Optional[str] = None, check_only: bool = False) -> int:
+    """Recompute state for one or all users, returning the number of failures."""
+    if user_id:
+        user_ids = [user_id]
+    else:
+        user_ids = await db["user_responses"].distinct("user_id")
+
+    catalog = QuestionCatalog()
+    await catalog.load(db)
+
+    failures = 0
+    for current_user in user_ids:
+        merged = await load_merged_history(db, current_user, catalog)
+        grouped = group_totals(merged)
+
+        mismatched = _check_against_engine(merged, grouped)
+        if mismatched:
+            failures += 1
+            print(f"{current_user}: state does not match scoring engine for {mismatched}")
+            continue
+
+        drifted = _drifted(await load_state(db, current_user), grouped)
+        if drifted:
+            print(f"{current_user}: stored state drifted for {sorted(drifted)}")
+            if check_only:
+                failures += 1
+
+        if not check_only and not await rebuild_state(db, current_user, catalog, grouped):
+            failures += 1
+            print(f"{current_user}: submits kept changing state during the rebuild; retry later")
+
+    print(f"Processed {len(user_ids)} users, {failures} failures")
+    return failures
+
+
+async def main() -> None:
+    """Connect to MongoDB and rebuild mastery state."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--user-id", help="Only rebuild state for this user")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Verify stored state without writing changes",
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    mongo_uri = os.getenv("MONGO_URI")
+    database_name = os.getenv("DATABASE_NAME")
+    if not mongo_uri or not database_name:
+        raise ValueError("MONGO_URI and DATABASE_NAME must be set")
+
+    client = AsyncIOMotorClient(mongo_uri)
+    db = client[database_name]
+
+    failures = await rebuild(db, args.user_id, args.check)
+
+    client.close()
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,185 @@
+"""Replay the response log through every scorer and compare their results.
+
+Responses are streamed per user in time order and folded a cursor batch at
+a time, so memory is bounded by one batch plus one user's sub-concept states. Reports agreement between the weighted and Elo
+scorers and each scorer's throughput in responses per second.
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from services.ability_scoring import rebuild_abilities
+from services.question_catalog import QuestionCatalog
+from services.response_stats import SCORING_PROJECTION, STREAM_BATCH_SIZE
+from services.scorers import SCORERS
+from services.scoring_engine import get_top_weak_areas, mastery_status
+
+
+class Agreement:
+    """Running comparison of two scorers' per-sub-concept results."""
+
+    def __init__(self) -> None:
+        self.pairs = 0
+        self.same_status = 0
+        self.absolute_error = 0.0
+        self.sums = [0.0] * 5
+        self.users = 0
+        self.weak_overlap = 0.0
+
+    def add_user(
+        self, baseline: Dict[str, Dict[str, Any]], candidate: Dict[str, Dict[str, Any]]
+    ) -> None:
+        for sub_concept, result in baseline.items():
+            x = result.get("mastery_score")
+            y = candidate.get(sub_concept, {}).get("mastery_score")
+            if x is None or y is None:
+                continue
+            self.pairs += 1
+            self.same_status += mastery_status(x) == mastery_status(y)
+            self.absolute_error += abs(x - y)
+            for index, value in enumerate((x, y, x * x, y * y, x * y)):
+                self.sums[index] += value
+
+        weak = {area["sub_concept"] for area in get_top_weak_areas(baseline)}
+        other = {area["sub_concept"] for area in get_top_weak_areas(candidate)}
+        if weak or other:
+            self.users += 1
+            self.weak_overlap += len(weak & other) / len(weak | other)
+
+    def report(self) -> Dict[str, Optional[float]]:
+        if not self.pairs:
+            return {"pairs": 0}
+        n = self.pairs
+        sx, sy, sxx, syy, sxy = self.sums
+        spread = math.sqrt(max(n * sxx - sx * sx, 0.0) * max(n * syy - sy * sy, 0.0))
+        return {
+            "pairs": n,
+            "status_agreement": self.same_status / n,
+            "mean_absolute_difference": self.absolute_error / n,
+            "correlation": (n * sxy - sx * sy) / spread if spread else None,
+            "weak_area_overlap": self.weak_overlap / self.users if self.users else None,
+        }
+
+
+def _fold(
+    states: Dict[str, Dict[str, Dict[str, Any]]],
+    responses: List[Dict[str, Any]],
+    elapsed: Dict[str, float],
+) -> None:
+    """Fold a batch of one user's merged, time-ordered responses into every scorer's states."""
+    for name, scorer in SCORERS.items():
+        started = time.perf_counter()
+        grouped = states[name]
+        for response in responses:
+            sub_concept = response.get("sub_concept")
+            if not sub_concept:
+                continue
+            state = grouped.get(sub_concept)
+            if state is None:
+                state = grouped[sub_concept] = scorer.new_state()
+            scorer.update(state, response)
+        elapsed[name] += time.perf_counter() - started
+
+
+async def replay(db, user_id: Optional[str] = None, apply: bool = False) -> Dict[str, Any]:
+    """Replay one or all users' responses and return the comparison report."""
+    catalog = QuestionCatalog()
+    await catalog.load(db)
+
+    agreement = Agreement()
+    elapsed = {name: 0.0 for name in SCORERS}
+    total = 0
+    users = 0
+    unsettled = 0
+
+    async def finish(current_user: str, states: Dict[str, Dict[str, Dict[str, Any]]]) -> None:
+        nonlocal users, unsettled
+        results = {
+            name: {sub: SCORERS[name].result(state) for sub, state in grouped.items()}
+            for name, grouped in states.items()
+        }
+        agreement.add_user(results["weighted"], results["elo"])
+        users += 1
+        if apply and not await rebuild_abilities(db, current_user, catalog, states["elo"]):
+            unsettled += 1
+            print(f"{current_user}: submits kept changing abilities during the replay; retry later")
+
+    query = {"user_id": user_id} if user_id else {}
+    cursor = db["user_responses"].find(
+        query, {**SCORING_PROJECTION, "user_id": 1}
+    ).sort([("user_id", 1), ("timestamp", 1)]).batch_size(STREAM_BATCH_SIZE)
+
+    # Responses are folded a batch at a time, so only the current user's
+    # states and one batch are held in memory.
+    current_user = None
+    states: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    batch: List[Dict[str, Any]] = []
+    async for response in cursor:
+        total += 1
+        if response["user_id"] != current_user:
+            if current_user is not None:
+                _fold(states, catalog.merge(batch), elapsed)
+                await finish(current_user, states)
+            current_user = response["user_id"]
+            states = {name: {} for name in SCORERS}
+            batch = []
+        batch.append(response)
+        if len(batch) >= STREAM_BATCH_SIZE:
+            _fold(states, catalog.merge(batch), elapsed)
+            batch = []
+    if current_user is not None:
+        _fold(states, catalog.merge(batch), elapsed)
+        await finish(current_user, states)
+
+    return {
+        "users": users,
+        "responses": total,
+        "unsettled": unsettled,
+        "responses_per_second": {
+            name: total / seconds if seconds else None for name, seconds in elapsed.items()
+        },
+        "agreement": agreement.report(),
+    }
+
+
+async def main() -> None:
+    """Connect to MongoDB and replay the response log."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--user-id", help="Only replay this user's responses")
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Store the replayed Elo abilities in user_ability_state",
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    mongo_uri = os.getenv("MONGO_URI")
+    database_name = os.getenv("DATABASE_NAME")
+    if not mongo_uri or not database_name:
+        raise ValueError("MONGO_URI and DATABASE_NAME must be set")
+
+    client = AsyncIOMotorClient(mongo_uri)
+    db = client[database_name]
+
+    report = await replay(db, args.user_id, args.apply)
+    print(f"Replayed {report['responses']} responses for {report['users']} users")
+    for name, rate in report["responses_per_second"].items():
+        print(f"  {name:>8}: {rate:,.0f} responses/s" if rate else f"  {name:>8}: n/a")
+    for key, value in report["agreement"].items():
+        print(f"  {key}: {value:.4f}" if isinstance(value, float) else f"  {key}: {value}")
+
+    client.close()
+    if report["unsettled"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
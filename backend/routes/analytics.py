@@ -1,64 +1,106 @@
 """Analytics routes."""
 
-from typing import Any, Dict, List
+from datetime import datetime
+from typing import Any, Dict, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
 
+from constants import MASTERY_HALF_LIFE_DAYS
 from database import get_database
+from models import AnalyticsResponse
 from services.scoring_engine import (
 	compute_concept_mastery,
 	compute_overall_mastery,
-	compute_subconcept_mastery,
 	get_top_weak_areas,
 )
 
+from services.analytics_cache import get_analytics_cache, get_user_version
+from services.analytics_views import parse_fields, shape_analytics
+from services.cohort_index import get_cohort_index
+from services.instrumentation import timed
+from services.mastery_history import build_history, downsample
+from services.mastery_rollups import combine_rollups, load_rollups, window_start
+from services.mastery_state import results_from_totals
+from services.question_catalog import get_catalog
 from services.recommendation_engine import generate_recommendations
+from services.scorers import get_scorer
 router = APIRouter()
 
 
-@router.get("/analytics/{user_id}")
-async def get_analytics(user_id: str) -> Dict[str, Any]:
+@router.get("/analytics/cohort/summary")
+async def get_cohort_summary() -> Dict[str, Any]:
+	"""Return the cohort mastery distribution per sub-concept."""
+	return get_cohort_index().summary()
+
+
+@router.get(
+	"/analytics/{user_id}",
+	response_model=AnalyticsResponse,
+	response_model_exclude_unset=True,
+)
+async def get_analytics(
+	user_id: str,
+	fields: Optional[str] = Query(None, description="Comma-separated top-level fields to return"),
+	recommendation_detail: str = Query("full", pattern="^(full|ids)$"),
+	precision: Optional[int] = Query(None, ge=0, le=10, description="Round floats to this many decimals"),
+) -> Dict[str, Any]:
 	"""Return mastery analytics and recommendations for a user."""
-	db = get_database()
-	responses = await db["user_responses"].find({"user_id": user_id}).to_list(None)
+	try:
+		selected = parse_fields(fields)
+	except ValueError as exc:
+		raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-	if not responses:
-		return {"message": "No data available"}
+	payload = await _load_analytics(user_id)
+	return shape_analytics(payload, selected, recommendation_detail, precision)
+
+
+async def _load_analytics(user_id: str) -> Dict[str, Any]:
+	"""Return the full analytics payload, from the cache when it is current."""
+	db = get_database()
+	catalog = await get_catalog(db)
 
-	question_ids = list({response.get("question_id") for response in responses})
-	questions = await db["questions"].find({"question_id": {"$in": question_ids}}).to_list(None)
-	questions_by_id = {question.get("question_id"): question for question in questions}
-
-	merged: List[Dict[str, Any]] = []
-	for response in responses:
-		question = questions_by_id.get(response.get("question_id"))
-		if not question:
-			continue
-		merged.append(
-			{
-				**response,
-				"difficulty": question.get("difficulty"),
-				"expected_time": question.get("expected_time"),
-				"sub_concept": question.get("sub_concept"),
-			}
+	cache = get_analytics_cache()
+	if cache is not None:
+		cache_key = cache.key(
+			user_id,
+			get_scorer().name,
+			await get_user_version(db, user_id),
+			catalog.version,
+			get_cohort_index().generation,
 		)
+		cached = await cache.get(cache_key)
+		if cached is not None:
+			return cached
 
-	grouped: Dict[str, List[Dict[str, Any]]] = {}
-	for item in merged:
-		sub_concept = item.get("sub_concept")
-		if not sub_concept:
-			continue
-		grouped.setdefault(sub_concept, []).append(item)
+	payload = await _compute_analytics(db, catalog, user_id)
+	if cache is not None:
+		await cache.set(cache_key, payload)
+	return payload
 
-	subconcept_results: Dict[str, Dict[str, Any]] = {}
-	for sub_concept, items in grouped.items():
-		subconcept_results[sub_concept] = compute_subconcept_mastery(items)
 
-	concept_mastery = compute_concept_mastery(subconcept_results)
-	overall_mastery = compute_overall_mastery(subconcept_results)
-	weak_areas = get_top_weak_areas(subconcept_results)
+async def _compute_analytics(db, catalog, user_id: str) -> Dict[str, Any]:
+	"""Build the analytics payload from the user's mastery state."""
+	scorer = get_scorer()
+	subconcept_results = await scorer.load_results(db, user_id, catalog)
 
-	recommendations = await generate_recommendations(weak_areas, db)
+	if not subconcept_results:
+		return {"message": "No data available"}
+
+	with timed("rollup"):
+		# Cohort distributions are built from weighted scores only.
+		if scorer.name == "weighted":
+			cohort_index = get_cohort_index()
+			for sub_concept, result in subconcept_results.items():
+				mastery_score = result.get("mastery_score")
+				if mastery_score is not None:
+					result["percentile"] = cohort_index.percentile(sub_concept, mastery_score)
+
+		concept_mastery = compute_concept_mastery(subconcept_results)
+		overall_mastery = compute_overall_mastery(subconcept_results)
+		weak_areas = get_top_weak_areas(subconcept_results)
+
+	with timed("recommendations"):
+		recommendations = generate_recommendations(weak_areas, catalog)
 
 	return {
 		"overall_mastery": overall_mastery,
@@ -67,3 +109,62 @@ async def get_analytics(user_id: str) -> Dict[str, Any]:
 		"weak_areas": weak_areas,
 		"recommendations": recommendations,
 	}
+
+
+@router.get("/analytics/{user_id}/mastery")
+async def get_windowed_mastery(
+	user_id: str,
+	window_days: Optional[int] = Query(None, ge=1),
+	half_life_days: float = Query(MASTERY_HALF_LIFE_DAYS, ge=0),
+) -> Dict[str, Any]:
+	"""Return mastery over a recent window, decaying older practice by half-life."""
+	db = get_database()
+	now = datetime.utcnow()
+	since = window_start(now, window_days) if window_days else None
+	rollups = await load_rollups(db, user_id, since)
+
+	if not rollups:
+		return {"message": "No data available"}
+
+	with timed("scoring"):
+		subconcept_results = results_from_totals(
+			combine_rollups(rollups, now, half_life_days)
+		)
+
+	return {
+		"window_days": window_days,
+		"half_life_days": half_life_days,
+		"overall_mastery": compute_overall_mastery(subconcept_results),
+		"concept_mastery": compute_concept_mastery(subconcept_results),
+		"subconcept_mastery": subconcept_results,
+	}
+
+
+@router.get("/analytics/{user_id}/history")
+async def get_mastery_history(
+	user_id: str,
+	resolution: str = Query("day", pattern="^(day|week)$"),
+	max_points: int = Query(200, ge=3, le=5000),
+) -> Dict[str, Any]:
+	"""Return cumulative mastery over time per sub-concept and concept."""
+	db = get_database()
+	rollups = await load_rollups(db, user_id)
+
+	if not rollups:
+		return {"message": "No data available"}
+
+	with timed("scoring"):
+		history = build_history(rollups, resolution)
+
+	with timed("downsampling"):
+		return {
+			"resolution": resolution,
+			"subconcepts": {
+				name: downsample(series, max_points)
+				for name, series in history["subconcepts"].items()
+			},
+			"concepts": {
+				name: downsample(series, max_points)
+				for name, series in history["concepts"].items()
+			},
+		}
@@ -0,0 +1,38 @@
+"""Export routes."""
+
+from datetime import datetime
+from typing import Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from database import get_database
+from services.exporter import EXPORT_KINDS, stream_export
+
+router = APIRouter()
+
+
+@router.get("/export/{kind}")
+async def get_export(
+	kind: str,
+	since: Optional[datetime] = Query(None, description="Inserted at or after (UTC); responses only"),
+	until: Optional[datetime] = Query(None, description="Inserted before (UTC); responses only"),
+	after: Optional[str] = Query(None, description="Resume after this _id"),
+) -> StreamingResponse:
+	"""Stream responses or per-user mastery as gzip-compressed NDJSON in _id order."""
+	if kind not in EXPORT_KINDS:
+		raise HTTPException(status_code=404, detail=f"Unknown export {kind!r}")
+	if kind == "mastery" and (since or until):
+		raise HTTPException(status_code=400, detail="since/until only apply to responses")
+	try:
+		after_id = ObjectId(after) if after else None
+	except InvalidId as exc:
+		raise HTTPException(status_code=400, detail="after must be an ObjectId") from exc
+
+	return StreamingResponse(
+		stream_export(get_database(), kind, since, until, after_id),
+		media_type="application/gzip",
+		headers={"Content-Disposition": f'attachment; filename="{kind}.ndjson.gz"'},
+	)
@@ -0,0 +1,25 @@
+"""Health routes."""
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+router = APIRouter()
+
+
+@router.get("/live")
+async def get_live(request: Request) -> JSONResponse:
+	"""Report whether the process can still become ready."""
+	if getattr(request.app.state, "warmup_failed", False):
+		return JSONResponse(status_code=503, content={"status": "warmup failed"})
+	return JSONResponse(content={"status": "alive"})
+
+
+@router.get("/ready")
+async def get_ready(request: Request) -> JSONResponse:
+	"""Report whether startup warmup has finished."""
+	state = request.app.state
+	if getattr(state, "warmup_failed", False):
+		return JSONResponse(status_code=503, content={"status": "warmup failed"})
+	if not getattr(state, "ready", False):
+		return JSONResponse(status_code=503, content={"status": "warming up"})
+	return JSONResponse(content={"status": "ready", "warmup_seconds": state.warmup_seconds})
@@ -0,0 +1,31 @@
+"""Metrics routes."""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from services.analytics_cache import get_analytics_cache
+from services.instrumentation import metrics
+from services.quiz_pools import get_quiz_pool
+from services.scoring_executor import get_scoring_executor
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+	"""Expose process metrics in the Prometheus text format."""
+	extra = {}
+	cache = get_analytics_cache()
+	if cache is not None:
+		stats = cache.stats()
+		extra["analytics_cache_hits_total"] = stats["hits"]
+		extra["analytics_cache_misses_total"] = stats["misses"]
+	pool_stats = get_quiz_pool().stats()
+	extra["quiz_pool_hits_total"] = pool_stats["hits"]
+	extra["quiz_pool_misses_total"] = pool_stats["misses"]
+	scoring_stats = get_scoring_executor().stats()
+	extra["scoring_inline_total"] = scoring_stats["inline"]
+	extra["scoring_offloaded_total"] = scoring_stats["offloaded"]
+	return PlainTextResponse(
+		metrics.render(extra), media_type="text/plain; version=0.0.4"
+	)
@@ -10,6 +10,7 @@ from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
 
 from constants import CONCEPTS
+from import_questions import import_catalog
 
 
 def _build_subconcept_plan(total_questions: int) -> List[Tuple[str, str]]:
@@ -57,14 +58,13 @@ async def main() -> None:
     client = AsyncIOMotorClient(mongo_uri)
     db = client[database_name]
 
-    await db["questions"].delete_many({})
-
     plan = _build_subconcept_plan(120)
     payload = [
         _build_question(index + 1, concept, sub_concept)
         for index, (concept, sub_concept) in enumerate(plan)
     ]
-    await db["questions"].insert_many(payload)
+    # Swap the placeholders in through staging so /quiz never sees an empty catalog.
+    await import_catalog(db, payload)
 
     client.close()
 
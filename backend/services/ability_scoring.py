@@ -0,0 +1,215 @@
+"""Online Elo/Rasch ability estimates per user and sub-concept."""
+
+import math
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+from pymongo import UpdateOne
+
+from constants import DIFFICULTY_RATINGS, ELO_INITIAL_ABILITY, ELO_K_DECAY, ELO_K_FACTOR
+from services.question_catalog import QuestionCatalog
+from services.response_columns import load_response_columns
+from services.state_backfills import REBUILD_ATTEMPTS, clear_backfilled, mark_backfilled
+
+ABILITY_STATE_COLLECTION = "user_ability_state"
+
+
+def question_rating(response: Dict[str, Any]) -> float:
+    """Return a question's rating, preferring a calibrated value over its level."""
+    rating = response.get("difficulty_rating")
+    if rating is not None:
+        return float(rating)
+    return DIFFICULTY_RATINGS.get(int(response.get("difficulty") or 0), 0.0)
+
+
+def empty_ability() -> Dict[str, Any]:
+    """Return the starting state for a sub-concept with no responses."""
+    return {"ability": ELO_INITIAL_ABILITY, "total_attempts": 0, "correct_count": 0}
+
+
+def update_ability(state: Dict[str, Any], response: Dict[str, Any]) -> None:
+    """Apply one Elo step for a merged response in place.
+
+    The step size shrinks with the number of responses seen, so estimates
+    settle as evidence accumulates.
+    """
+    update_ability_values(state, bool(response.get("is_correct")), question_rating(response))
+
+
+def update_ability_values(state: Dict[str, Any], is_correct: bool, rating: float) -> None:
+    """Apply one Elo step for an outcome against a question rating in place."""
+    outcome = 1.0 if is_correct else 0.0
+    expected = 1.0 / (1.0 + math.exp(rating - state["ability"]))
+    k_factor = ELO_K_FACTOR / (1.0 + ELO_K_DECAY * state["total_attempts"])
+    state["ability"] += k_factor * (outcome - expected)
+    state["total_attempts"] += 1
+    state["correct_count"] += int(outcome)
+
+
+def ability_result(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Score a sub-concept as the chance of solving a question rated 0, in percent."""
+    total_attempts = state.get("total_attempts", 0)
+    if total_attempts < 3:
+        return {"status": "Insufficient Data", "mastery_score": None}
+    ability = state["ability"]
+    return {
+        "status": "Evaluated",
+        "mastery_score": 100.0 / (1.0 + math.exp(-ability)),
+        "ability": ability,
+        "accuracy": state.get("correct_count", 0) / total_attempts,
+        "total_attempts": total_attempts,
+    }
+
+
+def group_abilities_from_columns(
+    columns, questions: List[Dict[str, Any]]
+) -> Dict[str, Dict[str, Any]]:
+    """Replay a ResponseColumns history into ability states keyed by sub-concept."""
+    ratings = [question_rating(question) for question in questions]
+    grouped: Dict[str, Dict[str, Any]] = {}
+    for question_index, is_correct in zip(columns.question_index, columns.correct):
+        sub_concept = questions[question_index].get("sub_concept")
+        if not sub_concept:
+            continue
+        state = grouped.get(sub_concept)
+        if state is None:
+            state = grouped[sub_concept] = empty_ability()
+        update_ability_values(state, bool(is_correct), ratings[question_index])
+    return grouped
+
+
+def _ability_step(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Express `update_ability` as an update pipeline so it runs without a read."""
+    outcome = 1 if response.get("is_correct") else 0
+    return [
+        {
+            "$set": {
+                "ability": {"$ifNull": ["$ability", ELO_INITIAL_ABILITY]},
+                "total_attempts": {"$ifNull": ["$total_attempts", 0]},
+                "correct_count": {"$ifNull": ["$correct_count", 0]},
+            }
+        },
+        {
+            "$set": {
+                "ability": {
+                    "$add": [
+                        "$ability",
+                        {
+                            "$multiply": [
+                                {
+                                    "$divide": [
+                                        ELO_K_FACTOR,
+                                        {"$add": [1, {"$multiply": [ELO_K_DECAY, "$total_attempts"]}]},
+                                    ]
+                                },
+                                {
+                                    "$subtract": [
+                                        outcome,
+                                        {
+                                            "$divide": [
+                                                1,
+                                                {
+                                                    "$add": [
+                                                        1,
+                                                        {
+                                                            "$exp": {
+                                                                "$subtract": [
+                                                                    question_rating(response),
+                                                                    "$ability",
+                                                                ]
+                                                            }
+                                                        },
+                                                    ]
+                                                },
+                                            ]
+                                        },
+                                    ]
+                                },
+                            ]
+                        },
+                    ]
+                },
+                "total_attempts": {"$add": ["$total_attempts", 1]},
+                "correct_count": {"$add": ["$correct_count", outcome]},
+                "updated_at": "$$NOW",
+            }
+        },
+    ]
+
+
+def build_ability_updates(
+    user_id: str, responses: Iterable[Dict[str, Any]]
+) -> List[UpdateOne]:
+    """Build one constant-time upsert per response; apply them in order."""
+    return [
+        UpdateOne(
+            {"user_id": user_id, "sub_concept": response["sub_concept"]},
+            _ability_step(response),
+            upsert=True,
+        )
+        for response in responses
+        if response.get("sub_concept")
+    ]
+
+
+async def load_abilities(db, user_id: str) -> Dict[str, Dict[str, Any]]:
+    """Return the stored ability states for a user keyed by sub-concept."""
+    documents = await db[ABILITY_STATE_COLLECTION].find(
+        {"user_id": user_id}, {"_id": 0, "user_id": 0, "updated_at": 0}
+    ).to_list(None)
+    return {document.pop("sub_concept"): document for document in documents}
+
+
+async def replace_abilities(
+    db, user_id: str, grouped: Dict[str, Dict[str, Any]]
+) -> None:
+    """Overwrite a user's stored ability states with replayed ones."""
+    collection = db[ABILITY_STATE_COLLECTION]
+    now = datetime.utcnow()
+    await collection.delete_many(
+        {"user_id": user_id, "sub_concept": {"$nin": list(grouped)}}
+    )
+    updates = [
+        UpdateOne(
+            {"user_id": user_id, "sub_concept": sub_concept},
+            {"$set": {**state, "updated_at": now}},
+            upsert=True,
+        )
+        for sub_concept, state in grouped.items()
+    ]
+    if updates:
+        await collection.bulk_write(updates, ordered=False)
+
+
+def abilities_match(
+    stored: Dict[str, Dict[str, Any]], replayed: Dict[str, Dict[str, Any]]
+) -> bool:
+    """Return whether stored ability states agree with a replay of the history."""
+    if set(stored) != set(replayed):
+        return False
+    return all(
+        math.isclose(stored[key].get(field, 0), replayed[key][field], rel_tol=1e-9, abs_tol=1e-9)
+        for key in replayed
+        for field in ("ability", "total_attempts", "correct_count")
+    )
+
+
+async def rebuild_abilities(
+    db, user_id: str, catalog: QuestionCatalog, grouped: Dict[str, Dict[str, Any]]
+) -> bool:
+    """Overwrite a user's abilities with `grouped`, verify them and mark them backfilled.
+
+    Verified the same way as `mastery_state.rebuild_state`: the stored
+    states are read back before the history is replayed again.
+    """
+    await clear_backfilled(db, [user_id], [ABILITY_STATE_COLLECTION])
+    for _ in range(REBUILD_ATTEMPTS):
+        await replace_abilities(db, user_id, grouped)
+        stored = await load_abilities(db, user_id)
+        snapshot = catalog.snapshot()
+        columns = await load_response_columns(db, user_id, snapshot)
+        grouped = group_abilities_from_columns(columns, snapshot.questions)
+        if abilities_match(stored, grouped):
+            await mark_backfilled(db, [user_id], [ABILITY_STATE_COLLECTION])
+            return True
+    return False
@@ -0,0 +1,126 @@
+"""Per-user analytics response cache invalidated by data versions."""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from config import (
+    ANALYTICS_CACHE_BACKEND,
+    ANALYTICS_CACHE_MAX_ENTRIES,
+    ANALYTICS_CACHE_TTL_SECONDS,
+    REDIS_URL,
+)
+
+USER_VERSIONS_COLLECTION = "user_data_versions"
+
+
+async def get_user_version(db, user_id: str) -> int:
+    """Return the user's data version, bumped on every stored submission."""
+    document = await db[USER_VERSIONS_COLLECTION].find_one({"_id": user_id})
+    return int(document.get("version", 0)) if document else 0
+
+
+async def bump_user_versions(db, user_ids: Iterable[str]) -> None:
+    """Invalidate cached analytics for every given user."""
+    updates = [
+        UpdateOne({"_id": user_id}, {"$inc": {"version": 1}}, upsert=True)
+        for user_id in set(user_ids)
+    ]
+    if updates:
+        await db[USER_VERSIONS_COLLECTION].bulk_write(updates, ordered=False)
+
+
+class MemoryBackend:
+    """Bounded in-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class RedisBackend:
+    """Redis-backed store so every worker process shares cached payloads."""
+
+    def __init__(self, url: str) -> None:
+        try:
+            from redis import asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("ANALYTICS_CACHE_BACKEND=redis requires the redis package") from exc
+        self._client = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self._client.get(key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await self._client.set(key, json.dumps(value), ex=max(1, int(ttl)))
+
+
+class AnalyticsCache:
+    """Cache analytics payloads under keys combining a user with every input version.
+
+    Submissions bump the user's version before they are acknowledged, so a
+    payload computed from older data can never be read under a current key.
+    """
+
+    def __init__(self, backend, ttl: float) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(user_id: str, *versions: Optional[int]) -> str:
+        return ":".join(["analytics", user_id, *(str(version) for version in versions)])
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = await self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        await self.backend.set(key, value, self.ttl)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def _build_cache() -> Optional[AnalyticsCache]:
+    if ANALYTICS_CACHE_BACKEND == "none":
+        return None
+    if ANALYTICS_CACHE_BACKEND == "redis":
+        backend = RedisBackend(REDIS_URL)
+    else:
+        backend = MemoryBackend(ANALYTICS_CACHE_MAX_ENTRIES)
+    return AnalyticsCache(backend, ANALYTICS_CACHE_TTL_SECONDS)
+
+
+_cache = _build_cache()
+
+
+def get_analytics_cache() -> Optional[AnalyticsCache]:
+    """Return the shared analytics cache, or None when caching is disabled."""
+    return _cache
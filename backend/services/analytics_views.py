@@ -0,0 +1,65 @@
+"""Trimmed views of the analytics payload requested by clients."""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+ANALYTICS_FIELDS = (
+    "overall_mastery",
+    "concept_mastery",
+    "subconcept_mastery",
+    "weak_areas",
+    "recommendations",
+)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated field list, raising ValueError on unknown names."""
+    if not fields:
+        return None
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(selected) - set(ANALYTICS_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown fields {unknown}; expected any of {list(ANALYTICS_FIELDS)}")
+    return selected
+
+
+def recommendation_ids(recommendations: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Replace each recommendation's practice questions with their ids."""
+    return [
+        {
+            "sub_concept": recommendation["sub_concept"],
+            "classification": recommendation.get("classification"),
+            "practice_question_ids": {
+                label: [question["question_id"] for question in questions]
+                for label, questions in recommendation.get("practice_questions", {}).items()
+            },
+        }
+        for recommendation in recommendations
+    ]
+
+
+def round_floats(value: Any, precision: int) -> Any:
+    """Return a copy of a JSON-like value with every float rounded."""
+    if isinstance(value, float):
+        return round(value, precision)
+    if isinstance(value, dict):
+        return {key: round_floats(item, precision) for key, item in value.items()}
+    if isinstance(value, list):
+        return [round_floats(item, precision) for item in value]
+    return value
+
+
+def shape_analytics(
+    payload: Dict[str, Any],
+    fields: Optional[List[str]] = None,
+    recommendation_detail: str = "full",
+    precision: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Select fields, shorten recommendations and round floats without mutating `payload`."""
+    if "message" in payload:
+        return payload
+    shaped = {field: payload[field] for field in fields or ANALYTICS_FIELDS if field in payload}
+    if recommendation_detail == "ids" and "recommendations" in shaped:
+        shaped["recommendations"] = recommendation_ids(shaped["recommendations"])
+    if precision is not None:
+        shaped = round_floats(shaped, precision)
+    return shaped
@@ -0,0 +1,213 @@
+"""Cohort mastery distributions for percentile ranking."""
+
+import asyncio
+import logging
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from services.mastery_state import MASTERY_STATE_COLLECTION
+from services.scoring_engine import TOTAL_FIELDS, compute_mastery_from_totals
+from services.state_backfills import backfilled_users
+
+COHORT_DISTRIBUTION_COLLECTION = "cohort_distributions"
+COHORT_META_ID = "__meta__"
+QUANTILE_POINTS = 1001
+SCAN_BATCH_SIZE = 5000
+
+logger = logging.getLogger(__name__)
+
+
+def summarize_scores(scores: array) -> Dict[str, Any]:
+    """Reduce a sub-concept's scores to a bounded sorted summary.
+
+    Small cohorts keep every score; larger ones keep evenly spaced quantiles,
+    so a summary never exceeds QUANTILE_POINTS values.
+    """
+    ordered = sorted(scores)
+    count = len(ordered)
+    if count <= QUANTILE_POINTS:
+        points = ordered
+    else:
+        step = (count - 1) / (QUANTILE_POINTS - 1)
+        points = [ordered[int(round(index * step))] for index in range(QUANTILE_POINTS)]
+    return {
+        "count": count,
+        "mean": sum(ordered) / count if count else 0.0,
+        "points": points,
+    }
+
+
+def _quantile(points: List[float], fraction: float) -> float:
+    return points[int(round(fraction * (len(points) - 1)))]
+
+
+class CohortIndex:
+    """In-memory copy of the latest persisted cohort distributions."""
+
+    def __init__(self) -> None:
+        self.generation: Optional[int] = None
+        self.refreshed_at: Optional[datetime] = None
+        self.distributions: Dict[str, Dict[str, Any]] = {}
+
+    def percentile(self, sub_concept: str, mastery_score: float) -> Optional[float]:
+        """Return the share of the cohort scoring strictly below, in O(log n)."""
+        distribution = self.distributions.get(sub_concept)
+        if not distribution or not distribution["points"]:
+            return None
+        points = distribution["points"]
+        return 100.0 * bisect_left(points, mastery_score) / len(points)
+
+    def summary(self) -> Dict[str, Any]:
+        """Return cohort size and score quartiles per sub-concept."""
+        sub_concepts = {}
+        for sub_concept, distribution in sorted(self.distributions.items()):
+            points = distribution["points"]
+            if not points:
+                continue
+            sub_concepts[sub_concept] = {
+                "users": distribution["count"],
+                "mean": distribution["mean"],
+                "p25": _quantile(points, 0.25),
+                "p50": _quantile(points, 0.5),
+                "p75": _quantile(points, 0.75),
+                "p90": _quantile(points, 0.9),
+            }
+        return {
+            "generation": self.generation,
+            "refreshed_at": self.refreshed_at,
+            "sub_concepts": sub_concepts,
+        }
+
+    async def load(self, db) -> None:
+        """Load the persisted distributions if a newer generation exists."""
+        collection = db[COHORT_DISTRIBUTION_COLLECTION]
+        meta = await collection.find_one({"_id": COHORT_META_ID})
+        if not meta or meta.get("generation") == self.generation:
+            return
+        documents = await collection.find(
+            {"generation": meta["generation"], "sub_concept": {"$exists": True}}
+        ).to_list(None)
+        self.distributions = {document["sub_concept"]: document for document in documents}
+        self.generation = meta["generation"]
+        self.refreshed_at = meta.get("refreshed_at")
+
+
+async def _add_scores(db, scores: Dict[str, array], batch: List[Dict[str, Any]]) -> None:
+    """Add the mastery scores of backfilled users in a batch of state documents."""
+    complete = await backfilled_users(
+        db, {document["user_id"] for document in batch}, [MASTERY_STATE_COLLECTION]
+    )
+    for document in batch:
+        if document["user_id"] not in complete:
+            continue
+        mastery_score = compute_mastery_from_totals(document).get("mastery_score")
+        if mastery_score is None:
+            continue
+        scores.setdefault(document["sub_concept"], array("d")).append(mastery_score)
+
+
+async def rebuild_distributions(db) -> int:
+    """Recompute every distribution from the mastery state in one linear scan.
+
+    Only users whose state is marked backfilled are counted; anyone else's
+    stored sums may cover part of their history. Returns the new generation.
+    Readers keep using the previous generation until the meta document is
+    switched over at the end.
+    """
+    scores: Dict[str, array] = {}
+    projection = {
+        "_id": 0,
+        "user_id": 1,
+        "sub_concept": 1,
+        **{field: 1 for field in TOTAL_FIELDS},
+    }
+    batch: List[Dict[str, Any]] = []
+    async for document in db[MASTERY_STATE_COLLECTION].find({}, projection).batch_size(
+        SCAN_BATCH_SIZE
+    ):
+        batch.append(document)
+        if len(batch) >= SCAN_BATCH_SIZE:
+            await _add_scores(db, scores, batch)
+            batch = []
+    if batch:
+        await _add_scores(db, scores, batch)
+
+    collection = db[COHORT_DISTRIBUTION_COLLECTION]
+    meta = await collection.find_one({"_id": COHORT_META_ID})
+    generation = (meta or {}).get("generation", 0) + 1
+    now = datetime.utcnow()
+
+    # Each generation is written under its own ids, so readers never see a
+    # mix of old and new distributions before the meta document switches.
+    # Leftovers of a refresh that died before switching are cleared first.
+    await collection.delete_many({"sub_concept": {"$exists": True}, "generation": generation})
+    if scores:
+        await collection.insert_many(
+            [
+                {
+                    "_id": f"{generation}:{sub_concept}",
+                    "sub_concept": sub_concept,
+                    "generation": generation,
+                    **summarize_scores(values),
+                }
+                for sub_concept, values in scores.items()
+            ]
+        )
+    await collection.update_one(
+        {"_id": COHORT_META_ID},
+        {"$set": {"generation": generation, "refreshed_at": now}},
+        upsert=True,
+    )
+    await collection.delete_many(
+        {"sub_concept": {"$exists": True}, "generation": {"$ne": generation}}
+    )
+    return generation
+
+
+async def _acquire_refresh_lease(db, interval: float) -> bool:
+    """Let a single worker claim the refresh once the previous one is due."""
+    now = datetime.utcnow()
+    try:
+        lease = await db[COHORT_DISTRIBUTION_COLLECTION].find_one_and_update(
+            {
+                "_id": COHORT_META_ID,
+                "$or": [
+                    {"lease_until": {"$exists": False}},
+                    {"lease_until": {"$lte": now}},
+                ],
+            },
+            {"$set": {"lease_until": now + timedelta(seconds=interval)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        return False
+    return lease is not None
+
+
+_cohort_index = CohortIndex()
+
+
+def get_cohort_index() -> CohortIndex:
+    """Return the shared cohort index."""
+    return _cohort_index
+
+
+async def run_periodic_refresh(get_db, interval: float) -> None:
+    """Refresh the distributions when due and keep this worker's copy current."""
+    while True:
+        db = get_db()
+        try:
+            if await _acquire_refresh_lease(db, interval):
+                await rebuild_distributions(db)
+            await _cohort_index.load(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Cohort index refresh failed")
+        await asyncio.sleep(min(interval, 60.0))
@@ -0,0 +1,375 @@
+"""Streaming exports of user responses and mastery for the data warehouse.
+
+Exports read a collection in `_id` order, so the last `_id` written is a
+resumable cursor. Because ObjectIds start with their creation time, `_id`
+ranges double as insertion-time ranges. That is how `since`/`until` select
+responses, and how a collection is cut into partitions for concurrent
+workers. Each worker holds at most one batch in memory.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from services.scorers import get_scorer
+from services.state_backfills import backfilled_users
+
+EXPORT_KINDS = ("responses", "mastery")
+EXPORT_FORMATS = ("ndjson", "parquet")
+EXPORT_BATCH_SIZE = 5000
+MANIFEST_NAME = "manifest.json"
+
+_PARQUET_COLUMNS = {
+    "responses": {
+        "_id": "string",
+        "user_id": "string",
+        "question_id": "string",
+        "is_correct": "bool",
+        "time_taken": "int64",
+        "attempts": "int64",
+        "timestamp": "timestamp",
+    },
+    "mastery": {
+        "_id": "string",
+        "user_id": "string",
+        "sub_concept": "string",
+        "scorer": "string",
+        "status": "string",
+        "mastery_score": "float64",
+        "accuracy": "float64",
+        "difficulty_weighted_accuracy": "float64",
+        "time_score": "float64",
+        "consistency_score": "float64",
+        "ability": "float64",
+        "total_attempts": "int64",
+    },
+}
+
+
+def export_source(kind: str) -> Tuple[str, Callable[[Dict[str, Any]], Dict[str, Any]]]:
+    """Return the collection an export reads and the function that turns a document into a row."""
+    if kind == "responses":
+
+        def response_row(document: Dict[str, Any]) -> Dict[str, Any]:
+            return {**document, "_id": str(document["_id"])}
+
+        return "user_responses", response_row
+    if kind == "mastery":
+        scorer = get_scorer()
+
+        def mastery_row(document: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                "_id": str(document["_id"]),
+                "user_id": document.get("user_id"),
+                "sub_concept": document.get("sub_concept"),
+                "scorer": scorer.name,
+                **scorer.result(document),
+            }
+
+        return scorer.collection, mastery_row
+    raise ValueError(f"Unknown export kind {kind!r}; expected one of {list(EXPORT_KINDS)}")
+
+
+async def exportable(db, kind: str, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop mastery state of users whose state does not yet cover their full history.
+
+    Those users are served from raw history by /analytics, so their partial
+    stored sums would disagree with it; they are exported once rebuilt.
+    """
+    if kind != "mastery":
+        return batch
+    complete = await backfilled_users(
+        db, {document["user_id"] for document in batch}, [get_scorer().collection]
+    )
+    return [document for document in batch if document["user_id"] in complete]
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_ndjson_gzip(rows: List[Dict[str, Any]]) -> bytes:
+    """Encode rows as one gzip member of NDJSON.
+
+    Members can be concatenated and are read back as a single stream by
+    gzip, zcat and most warehouse loaders.
+    """
+    text = "".join(json.dumps(row, default=_jsonable, separators=(",", ":")) + "\n" for row in rows)
+    return gzip.compress(text.encode("utf-8"), compresslevel=6)
+
+
+def id_range(
+    since: Optional[datetime] = None, until: Optional[datetime] = None
+) -> Dict[str, ObjectId]:
+    """Return an `_id` condition selecting documents inserted in [since, until)."""
+    condition = {}
+    if since is not None:
+        condition["$gte"] = ObjectId.from_datetime(since)
+    if until is not None:
+        condition["$lt"] = ObjectId.from_datetime(until)
+    return condition
+
+
+async def partition_bounds(
+    collection, condition: Dict[str, ObjectId], partitions: int
+) -> List[Tuple[ObjectId, ObjectId]]:
+    """Split the documents matching `condition` into `_id` ranges of equal time span."""
+    query = {"_id": condition} if condition else {}
+    first = await collection.find_one(query, {"_id": 1}, sort=[("_id", 1)])
+    if first is None:
+        return []
+    last = await collection.find_one(query, {"_id": 1}, sort=[("_id", -1)])
+    start = first["_id"].generation_time
+    span = last["_id"].generation_time + timedelta(seconds=1) - start
+    edges = []
+    for index in range(max(partitions, 1) + 1):
+        edge = ObjectId.from_datetime(start + span * index / max(partitions, 1))
+        if not edges or edge != edges[-1]:
+            edges.append(edge)
+    return list(zip(edges, edges[1:]))
+
+
+async def iter_batches(
+    collection,
+    lower: ObjectId,
+    upper: ObjectId,
+    after: Optional[ObjectId] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield documents with lower <= _id < upper in `_id` order, resuming after `after`."""
+    condition: Dict[str, Any] = {"$gte": lower, "$lt": upper}
+    if after is not None:
+        condition["$gt"] = after
+    cursor = collection.find({"_id": condition}).sort("_id", 1).batch_size(batch_size)
+    batch: List[Dict[str, Any]] = []
+    async for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def stream_export(
+    db,
+    kind: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after: Optional[ObjectId] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """Yield a gzip-compressed NDJSON export one batch at a time."""
+    collection_name, to_row = export_source(kind)
+    condition = id_range(since, until)
+    lower = condition.get("$gte", ObjectId("0" * 24))
+    upper = condition.get("$lt", ObjectId("f" * 24))
+    async for batch in iter_batches(db[collection_name], lower, upper, after, batch_size):
+        documents = await exportable(db, kind, batch)
+        if documents:
+            rows = [to_row(document) for document in documents]
+            yield await asyncio.to_thread(encode_ndjson_gzip, rows)
+
+
+class _NdjsonWriter:
+    """Appends gzip members to a partition file; resumes at the last checkpointed offset."""
+
+    resumable = True
+
+    def __init__(self, path: Path, offset: int) -> None:
+        mode = "r+b" if path.exists() else "wb"
+        self._handle = path.open(mode)
+        self._handle.truncate(offset)
+        self._handle.seek(offset)
+
+    def write(self, rows: List[Dict[str, Any]]) -> int:
+        self._handle.write(encode_ndjson_gzip(rows))
+        self._handle.flush()
+        return self._handle.tell()
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+class _ParquetWriter:
+    """Writes one row group per batch; an interrupted partition is rewritten."""
+
+    resumable = False
+
+    def __init__(self, path: Path, kind: str) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError("Parquet exports require the pyarrow package") from exc
+        types = {
+            "string": pa.string(),
+            "bool": pa.bool_(),
+            "int64": pa.int64(),
+            "float64": pa.float64(),
+            "timestamp": pa.timestamp("ms"),
+        }
+        self._pa = pa
+        self._schema = pa.schema(
+            [(name, types[type_name]) for name, type_name in _PARQUET_COLUMNS[kind].items()]
+        )
+        self._writer = pq.ParquetWriter(str(path), self._schema, compression="zstd")
+        self._written = 0
+
+    def write(self, rows: List[Dict[str, Any]]) -> int:
+        self._writer.write_table(self._pa.Table.from_pylist(rows, schema=self._schema))
+        self._written += len(rows)
+        return self._written
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class Exporter:
+    """Exports one kind of data to a directory of partition files with a resumable manifest."""
+
+    def __init__(
+        self,
+        db,
+        kind: str,
+        out_dir: Path,
+        file_format: str = "ndjson",
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> None:
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format {file_format!r}; expected one of {list(EXPORT_FORMATS)}")
+        self.db = db
+        self.kind = kind
+        self.out_dir = out_dir
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.collection_name, self.to_row = export_source(kind)
+        self.manifest_path = out_dir / MANIFEST_NAME
+        self.manifest: Dict[str, Any] = {}
+        self.rows = 0
+
+    async def plan(
+        self,
+        since: Optional[datetime],
+        until: Optional[datetime],
+        partitions: int,
+        restart: bool = False,
+    ) -> None:
+        """Load the manifest of an interrupted export, or partition a new one."""
+        settings = {
+            "kind": self.kind,
+            "format": self.file_format,
+            "since": since.isoformat() if since else None,
+            "until": until.isoformat() if until else None,
+        }
+        if self.manifest_path.exists():
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            if not restart and {key: manifest.get(key) for key in settings} == settings:
+                self.manifest = manifest
+                return
+            # Files of the previous export would otherwise be loaded alongside the new ones.
+            for partition in manifest.get("partitions", []):
+                (self.out_dir / partition["file"]).unlink(missing_ok=True)
+
+        bounds = await partition_bounds(
+            self.db[self.collection_name], id_range(since, until), partitions
+        )
+        extension = "ndjson.gz" if self.file_format == "ndjson" else "parquet"
+        self.manifest = {
+            **settings,
+            "partitions": [
+                {
+                    "file": f"{self.kind}-{index:05d}.{extension}",
+                    "lower": str(lower),
+                    "upper": str(upper),
+                    "last_id": None,
+                    "offset": 0,
+                    "rows": 0,
+                    "done": False,
+                }
+                for index, (lower, upper) in enumerate(bounds)
+            ],
+        }
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self._save_manifest()
+
+    def _save_manifest(self) -> None:
+        temporary = self.manifest_path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(self.manifest, indent=2), encoding="utf-8")
+        os.replace(temporary, self.manifest_path)
+
+    def _open(self, partition: Dict[str, Any]):
+        path = self.out_dir / partition["file"]
+        if self.file_format == "ndjson":
+            return _NdjsonWriter(path, partition["offset"])
+        return _ParquetWriter(path, self.kind)
+
+    async def _export_partition(self, partition: Dict[str, Any]) -> None:
+        writer = self._open(partition)
+        if not writer.resumable:
+            partition.update(last_id=None, offset=0, rows=0)
+        after = ObjectId(partition["last_id"]) if partition["last_id"] else None
+        try:
+            async for batch in iter_batches(
+                self.db[self.collection_name],
+                ObjectId(partition["lower"]),
+                ObjectId(partition["upper"]),
+                after,
+                self.batch_size,
+            ):
+                documents = await exportable(self.db, self.kind, batch)
+                rows = [self.to_row(document) for document in documents]
+                offset = partition["offset"]
+                if rows:
+                    # Encoding and compression run off the event loop so other
+                    # partitions keep reading while this batch is written.
+                    offset = await asyncio.to_thread(writer.write, rows)
+                partition.update(
+                    last_id=str(batch[-1]["_id"]),
+                    offset=offset,
+                    rows=partition["rows"] + len(rows),
+                )
+                self.rows += len(rows)
+                if writer.resumable:
+                    self._save_manifest()
+        finally:
+            await asyncio.to_thread(writer.close)
+        partition["done"] = True
+        self._save_manifest()
+
+    async def run(self, workers: int = 4) -> Dict[str, Any]:
+        """Export every unfinished partition with `workers` concurrent workers."""
+        pending: asyncio.Queue = asyncio.Queue()
+        for partition in self.manifest["partitions"]:
+            if not partition["done"]:
+                pending.put_nowait(partition)
+
+        async def worker() -> None:
+            while True:
+                try:
+                    partition = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await self._export_partition(partition)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(max(workers, 1))))
+        seconds = time.perf_counter() - started
+        return {
+            "rows": self.rows,
+            "total_rows": sum(partition["rows"] for partition in self.manifest["partitions"]),
+            "partitions": len(self.manifest["partitions"]),
+            "seconds": seconds,
+            "rows_per_second": self.rows / seconds if seconds else 0.0,
+        }
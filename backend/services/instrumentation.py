@@ -0,0 +1,200 @@
+"""Per-request timing and process-wide metrics.
+
+Each request gets a RequestTimings object held in a context variable.
+Motor copies the caller's context into its executor threads, so the
+command listener below attributes every MongoDB command to the request that
+issued it. Stage timers and command durations also feed the process-wide
+registry that /metrics renders in the Prometheus text format.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from config import INSTRUMENTATION_ENABLED
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class RequestTimings:
+    """Time spent per stage and in MongoDB during one request."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.stages: Dict[str, float] = {}
+        self.db_commands = 0
+        self.db_seconds = 0.0
+
+    def add_stage(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_command(self, seconds: float) -> None:
+        with self._lock:
+            self.db_commands += 1
+            self.db_seconds += seconds
+
+    def server_timing(self, total_seconds: float) -> str:
+        """Render the timings as a Server-Timing header value."""
+        entries = [
+            f'db;dur={self.db_seconds * 1000.0:.2f};desc="{self.db_commands} commands"'
+        ]
+        entries.extend(
+            f"{stage};dur={seconds * 1000.0:.2f}" for stage, seconds in self.stages.items()
+        )
+        entries.append(f"total;dur={total_seconds * 1000.0:.2f}")
+        return ", ".join(entries)
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms rendered in Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], List[float]] = {}
+
+    def describe(self, name: str, kind: str, text: str) -> None:
+        self._help[name] = (kind, text)
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            # Bucket counts, then sum and count, as in a Prometheus histogram.
+            values = self._histograms.get(key)
+            if values is None:
+                values = self._histograms[key] = [0.0] * (len(LATENCY_BUCKETS) + 2)
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    values[index] += 1
+            values[-2] += seconds
+            values[-1] += 1
+
+    def render(self, extra: Optional[Dict[str, float]] = None) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(values) for key, values in self._histograms.items()}
+
+        lines: List[str] = []
+        described = set()
+
+        def header(name: str) -> None:
+            if name in described or name not in self._help:
+                return
+            kind, text = self._help[name]
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+            described.add(name)
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), values in sorted(histograms.items()):
+            header(name)
+            for bound, count in zip(LATENCY_BUCKETS, values):
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', f'{bound:g}'),))} {count:g}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {values[-1]:g}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {values[-2]:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {values[-1]:g}")
+        for name, value in sorted((extra or {}).items()):
+            header(name)
+            lines.append(f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        key + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+metrics = MetricsRegistry()
+metrics.describe("http_requests_total", "counter", "HTTP requests by route, method and status.")
+metrics.describe("http_request_duration_seconds", "histogram", "HTTP request latency by route.")
+metrics.describe("app_stage_duration_seconds", "histogram", "Time spent in instrumented request stages.")
+metrics.describe("mongodb_commands_total", "counter", "MongoDB commands by name and outcome.")
+metrics.describe("mongodb_command_duration_seconds", "histogram", "MongoDB command latency by name.")
+metrics.describe("analytics_cache_hits_total", "counter", "Analytics cache hits in this process.")
+metrics.describe("analytics_cache_misses_total", "counter", "Analytics cache misses in this process.")
+metrics.describe("quiz_pool_hits_total", "counter", "Quizzes served from a pre-assembled ring.")
+metrics.describe("quiz_pool_misses_total", "counter", "Quizzes assembled on request because a ring was empty.")
+metrics.describe("scoring_inline_total", "counter", "Histories scored on the event loop.")
+metrics.describe("scoring_offloaded_total", "counter", "Histories scored in the scoring process pool.")
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def begin_request() -> Optional[RequestTimings]:
+    """Start collecting timings for the current request, if enabled."""
+    if not INSTRUMENTATION_ENABLED:
+        return None
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def record_request(route: str, method: str, status: int, seconds: float) -> None:
+    """Record one finished HTTP request."""
+    metrics.inc("http_requests_total", route=route, method=method, status=str(status))
+    metrics.observe("http_request_duration_seconds", seconds, route=route, method=method)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Time a block as a named stage of the current request."""
+    if not INSTRUMENTATION_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        timings = _current.get()
+        if timings is not None:
+            timings.add_stage(stage, seconds)
+        metrics.observe("app_stage_duration_seconds", seconds, stage=stage)
+
+
+class CommandTimer(monitoring.CommandListener):
+    """Count and time MongoDB commands per request and per command name."""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._record(event.command_name, event.duration_micros, "ok")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._record(event.command_name, event.duration_micros, "error")
+
+    @staticmethod
+    def _record(command: str, duration_micros: int, outcome: str) -> None:
+        seconds = duration_micros / 1_000_000.0
+        timings = _current.get()
+        if timings is not None:
+            timings.add_command(seconds)
+        metrics.inc("mongodb_commands_total", command=command, outcome=outcome)
+        metrics.observe("mongodb_command_duration_seconds", seconds, command=command)
+
+
+def command_listeners() -> List[monitoring.CommandListener]:
+    """Return the listeners to register on the MongoDB client."""
+    return [CommandTimer()] if INSTRUMENTATION_ENABLED else []
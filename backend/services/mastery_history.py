@@ -0,0 +1,86 @@
+"""Mastery trajectories built from daily rollups."""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List
+
+from services.scoring_engine import (
+    TOTAL_FIELDS,
+    compute_concept_mastery,
+    compute_mastery_from_totals,
+    empty_totals,
+)
+from utils.downsampling import lttb
+
+RESOLUTIONS = ("day", "week")
+
+
+def period_start(day: datetime, resolution: str) -> datetime:
+    """Return the first day of the period containing `day`."""
+    if resolution == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def build_history(
+    rollups: Iterable[Dict[str, Any]], resolution: str = "day"
+) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+    """Compute cumulative mastery per period in one pass over day-ordered rollups.
+
+    Running prefix sums per sub-concept make every point O(1): each period
+    only folds in the rollups that fall inside it and rescores the
+    sub-concepts they touched.
+    """
+    prefix: Dict[str, Dict[str, Any]] = {}
+    results: Dict[str, Dict[str, Any]] = {}
+    subconcepts: Dict[str, List[Dict[str, Any]]] = {}
+    concepts: Dict[str, List[Dict[str, Any]]] = {}
+
+    def emit(period: datetime, touched: Iterable[str]) -> None:
+        date = period.date().isoformat()
+        for sub_concept in touched:
+            result = compute_mastery_from_totals(prefix[sub_concept])
+            results[sub_concept] = result
+            if result.get("mastery_score") is not None:
+                subconcepts.setdefault(sub_concept, []).append(
+                    {"date": date, "mastery_score": result["mastery_score"]}
+                )
+        for concept, result in compute_concept_mastery(results).items():
+            mastery_score = result.get("mastery_score")
+            if mastery_score is None:
+                continue
+            series = concepts.setdefault(concept, [])
+            if not series or series[-1]["mastery_score"] != mastery_score:
+                series.append({"date": date, "mastery_score": mastery_score})
+
+    current = None
+    touched = set()
+    for rollup in rollups:
+        period = period_start(rollup["day"], resolution)
+        if current is not None and period != current:
+            emit(current, touched)
+            touched = set()
+        current = period
+
+        sub_concept = rollup["sub_concept"]
+        totals = prefix.get(sub_concept)
+        if totals is None:
+            totals = prefix[sub_concept] = empty_totals()
+        for field in TOTAL_FIELDS:
+            totals[field] += rollup.get(field, 0)
+        touched.add(sub_concept)
+
+    if current is not None:
+        emit(current, touched)
+
+    return {"subconcepts": subconcepts, "concepts": concepts}
+
+
+def downsample(series: List[Dict[str, Any]], max_points: int) -> List[Dict[str, Any]]:
+    """Reduce a series to at most `max_points` points, preserving its shape."""
+    if len(series) <= max_points:
+        return series
+    points = [
+        (datetime.fromisoformat(point["date"]).toordinal(), point["mastery_score"])
+        for point in series
+    ]
+    return [series[index] for index in lttb(points, max_points)]
@@ -0,0 +1,132 @@
+"""Daily per-user, per-sub-concept rollups for windowed and decayed mastery."""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ReplaceOne, UpdateOne
+
+from services.scoring_engine import TOTAL_FIELDS, accumulate_response, empty_totals
+
+DAILY_ROLLUP_COLLECTION = "user_mastery_daily"
+
+
+def day_start(timestamp: datetime) -> datetime:
+    """Truncate a UTC timestamp to midnight."""
+    return datetime(timestamp.year, timestamp.month, timestamp.day)
+
+
+def group_daily_totals(
+    responses: Iterable[Dict[str, Any]]
+) -> Dict[Tuple[str, datetime], Dict[str, Any]]:
+    """Reduce merged responses to running sums keyed by (sub-concept, day)."""
+    grouped: Dict[Tuple[str, datetime], Dict[str, Any]] = {}
+    for response in responses:
+        sub_concept = response.get("sub_concept")
+        timestamp = response.get("timestamp")
+        if not sub_concept or timestamp is None:
+            continue
+        key = (sub_concept, day_start(timestamp))
+        totals = grouped.get(key)
+        if totals is None:
+            totals = grouped[key] = empty_totals()
+        accumulate_response(totals, response)
+    return grouped
+
+
+def build_rollup_updates(
+    user_id: str, grouped: Dict[Tuple[str, datetime], Dict[str, Any]]
+) -> List[UpdateOne]:
+    """Build upserts that add daily sums to the stored rollups."""
+    return [
+        UpdateOne(
+            {"user_id": user_id, "sub_concept": sub_concept, "day": day},
+            {"$inc": {field: totals[field] for field in TOTAL_FIELDS}},
+            upsert=True,
+        )
+        for (sub_concept, day), totals in grouped.items()
+    ]
+
+
+async def load_rollups(
+    db, user_id: str, since: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """Return a user's daily rollups, oldest first, optionally from a given day."""
+    query: Dict[str, Any] = {"user_id": user_id}
+    if since is not None:
+        query["day"] = {"$gte": day_start(since)}
+    return await db[DAILY_ROLLUP_COLLECTION].find(
+        query, {"_id": 0, "user_id": 0}
+    ).sort("day", 1).to_list(None)
+
+
+def combine_rollups(
+    rollups: Iterable[Dict[str, Any]],
+    now: datetime,
+    half_life_days: Optional[float] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Sum rollups per sub-concept, weighting each day by 0.5 ** (age / half-life).
+
+    Without a half-life every day counts fully, which gives plain windowed sums.
+    """
+    grouped: Dict[str, Dict[str, Any]] = {}
+    for rollup in rollups:
+        weight = 1.0
+        if half_life_days:
+            age_days = max((now - rollup["day"]).total_seconds() / 86400.0, 0.0)
+            weight = 0.5 ** (age_days / half_life_days)
+
+        totals = grouped.get(rollup["sub_concept"])
+        if totals is None:
+            totals = grouped[rollup["sub_concept"]] = empty_totals()
+        for field in TOTAL_FIELDS:
+            value = rollup.get(field, 0)
+            totals[field] += value * weight if half_life_days else value
+    return grouped
+
+
+async def replace_rollups(
+    db,
+    user_id: str,
+    grouped: Dict[Tuple[str, datetime], Dict[str, Any]],
+    started: Optional[datetime] = None,
+) -> None:
+    """Overwrite a user's rollups with freshly computed daily sums.
+
+    Each day is replaced on its own, so submits keep incrementing every
+    other rollup while the rebuild runs. Days missing from `grouped` are
+    deleted only before the day the rebuild's history read `started`, since
+    a live submit may have created a later one.
+    """
+    collection = db[DAILY_ROLLUP_COLLECTION]
+    updates = [
+        ReplaceOne(
+            {"user_id": user_id, "sub_concept": sub_concept, "day": day},
+            {
+                "user_id": user_id,
+                "sub_concept": sub_concept,
+                "day": day,
+                **{field: totals[field] for field in TOTAL_FIELDS},
+            },
+            upsert=True,
+        )
+        for (sub_concept, day), totals in grouped.items()
+    ]
+    if updates:
+        await collection.bulk_write(updates, ordered=False)
+
+    cutoff = day_start(started or datetime.utcnow())
+    existing = await collection.find(
+        {"user_id": user_id, "day": {"$lt": cutoff}}, {"sub_concept": 1, "day": 1}
+    ).to_list(None)
+    stale = [
+        document["_id"]
+        for document in existing
+        if (document["sub_concept"], document["day"]) not in grouped
+    ]
+    if stale:
+        await collection.delete_many({"_id": {"$in": stale}})
+
+
+def window_start(now: datetime, window_days: int) -> datetime:
+    """Return the first day included in a window ending today."""
+    return day_start(now) - timedelta(days=window_days - 1)
@@ -0,0 +1,166 @@
+"""Incrementally maintained per-user mastery aggregates."""
+
+import asyncio
+import math
+from datetime import datetime
+from typing import Any, Dict, Hashable, Iterable, List
+
+from pymongo import UpdateOne
+
+from config import HISTORY_TOTALS_MODE
+from services.analytics_cache import bump_user_versions
+from services.question_catalog import QuestionCatalog
+from services.response_columns import load_response_columns
+from services.response_stats import aggregate_subconcept_totals
+from services.scoring_executor import get_scoring_executor
+from services.scoring_engine import (
+    TOTAL_FIELDS,
+    accumulate_response,
+    compute_mastery_from_totals,
+    empty_totals,
+    group_totals_from_columns,
+)
+from services.state_backfills import (
+    REBUILD_ATTEMPTS,
+    clear_backfilled,
+    is_backfilled,
+    mark_backfilled,
+)
+
+MASTERY_STATE_COLLECTION = "user_mastery_state"
+
+
+async def load_merged_history(
+    db, user_id: str, catalog: QuestionCatalog
+) -> List[Dict[str, Any]]:
+    """Load a user's responses joined with the question fields used for scoring."""
+    responses = await db["user_responses"].find(
+        {"user_id": user_id}, {"_id": 0}
+    ).sort("timestamp", 1).to_list(None)
+    return catalog.merge(responses)
+
+
+def group_totals(responses: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Reduce merged responses to running sums keyed by sub-concept."""
+    grouped: Dict[str, Dict[str, Any]] = {}
+    for response in responses:
+        sub_concept = response.get("sub_concept")
+        if not sub_concept:
+            continue
+        totals = grouped.get(sub_concept)
+        if totals is None:
+            totals = grouped[sub_concept] = empty_totals()
+        accumulate_response(totals, response)
+    return grouped
+
+
+def build_state_updates(
+    user_id: str, grouped: Dict[str, Dict[str, Any]]
+) -> List[UpdateOne]:
+    """Build upserts that add a submission's sums to the stored state."""
+    now = datetime.utcnow()
+    return [
+        UpdateOne(
+            {"user_id": user_id, "sub_concept": sub_concept},
+            {
+                "$inc": {field: totals[field] for field in TOTAL_FIELDS},
+                "$set": {"updated_at": now},
+            },
+            upsert=True,
+        )
+        for sub_concept, totals in grouped.items()
+    ]
+
+
+async def load_state(db, user_id: str) -> Dict[str, Dict[str, Any]]:
+    """Return the stored running sums for a user keyed by sub-concept."""
+    documents = await db[MASTERY_STATE_COLLECTION].find(
+        {"user_id": user_id}, {"_id": 0, "user_id": 0, "updated_at": 0}
+    ).to_list(None)
+    return {document.pop("sub_concept"): document for document in documents}
+
+
+async def load_totals(
+    db, user_id: str, catalog: QuestionCatalog
+) -> Dict[str, Dict[str, Any]]:
+    """Return a user's running sums, recomputing from raw responses until state is backfilled."""
+    totals, complete = await asyncio.gather(
+        load_state(db, user_id), is_backfilled(db, user_id, MASTERY_STATE_COLLECTION)
+    )
+    if complete:
+        return totals
+    if HISTORY_TOTALS_MODE == "stream":
+        # The fold runs in the scoring pool for long histories; column
+        # positions index the snapshot the history was loaded against.
+        snapshot = catalog.snapshot()
+        columns = await load_response_columns(db, user_id, snapshot)
+        return await get_scoring_executor().score(group_totals_from_columns, columns, snapshot)
+    return await aggregate_subconcept_totals(db, user_id)
+
+
+async def replace_state(
+    db, user_id: str, grouped: Dict[str, Dict[str, Any]]
+) -> None:
+    """Overwrite a user's stored state with freshly computed sums."""
+    collection = db[MASTERY_STATE_COLLECTION]
+    now = datetime.utcnow()
+    await collection.delete_many(
+        {"user_id": user_id, "sub_concept": {"$nin": list(grouped)}}
+    )
+    updates = [
+        UpdateOne(
+            {"user_id": user_id, "sub_concept": sub_concept},
+            {"$set": {**{field: totals[field] for field in TOTAL_FIELDS}, "updated_at": now}},
+            upsert=True,
+        )
+        for sub_concept, totals in grouped.items()
+    ]
+    if updates:
+        await collection.bulk_write(updates, ordered=False)
+    await bump_user_versions(db, [user_id])
+
+
+def totals_match(
+    stored: Dict[Hashable, Dict[str, Any]], rebuilt: Dict[Hashable, Dict[str, Any]]
+) -> bool:
+    """Return whether two sets of running sums agree, allowing for float summation order."""
+    if set(stored) != set(rebuilt):
+        return False
+    return all(
+        math.isclose(stored[key].get(field, 0), rebuilt[key][field], rel_tol=1e-9, abs_tol=1e-9)
+        for key in rebuilt
+        for field in TOTAL_FIELDS
+    )
+
+
+async def rebuild_state(
+    db, user_id: str, catalog: QuestionCatalog, grouped: Dict[str, Dict[str, Any]]
+) -> bool:
+    """Overwrite a user's state with `grouped`, verify it and mark it backfilled.
+
+    A submit that lands between the history read and the write has its
+    increment overwritten. So the state is read back and the history read
+    again: a response is inserted before its increment is applied, so any
+    response counted in the state is also in the later history, and a match
+    proves nothing was lost. On a mismatch the rewrite repeats from the newer
+    history. Returns False, leaving the user unmarked, if no attempt matched.
+    """
+    await clear_backfilled(db, [user_id], [MASTERY_STATE_COLLECTION])
+    for _ in range(REBUILD_ATTEMPTS):
+        await replace_state(db, user_id, grouped)
+        stored = await load_state(db, user_id)
+        grouped = group_totals(await load_merged_history(db, user_id, catalog))
+        if totals_match(stored, grouped):
+            await mark_backfilled(db, [user_id], [MASTERY_STATE_COLLECTION])
+            return True
+    return False
+
+
+def results_from_totals(
+    grouped: Dict[str, Dict[str, Any]]
+) -> Dict[str, Dict[str, Any]]:
+    """Score every sub-concept from its running sums."""
+    return {
+        sub_concept: compute_mastery_from_totals(totals)
+        for sub_concept, totals in grouped.items()
+    }
@@ -0,0 +1,149 @@
+"""In-process cache of the question catalog."""
+
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+CATALOG_META_COLLECTION = "catalog_meta"
+CATALOG_VERSION_ID = "questions"
+VERSION_CHECK_INTERVAL = 5.0
+
+
+class QuestionCatalog:
+    """Questions indexed by id, sub-concept, and (sub-concept, difficulty)."""
+
+    def __init__(self, check_interval: float = VERSION_CHECK_INTERVAL) -> None:
+        self.check_interval = check_interval
+        self.version: Optional[int] = None
+        self.loaded = False
+        self.questions: List[Dict[str, Any]] = []
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.positions: Dict[str, int] = {}
+        self.by_sub_concept: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_bucket: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def index(self, questions: Iterable[Dict[str, Any]], version: Optional[int]) -> None:
+        """Replace the indexes with the given question documents."""
+        by_id: Dict[str, Dict[str, Any]] = {}
+        by_sub_concept: Dict[str, List[Dict[str, Any]]] = {}
+        by_bucket: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+        ordered: List[Dict[str, Any]] = []
+
+        positions: Dict[str, int] = {}
+        for question in questions:
+            question_id = question.get("question_id")
+            if not question_id:
+                continue
+            positions[question_id] = len(ordered)
+            ordered.append(question)
+            by_id[question_id] = question
+            sub_concept = question.get("sub_concept")
+            if sub_concept:
+                by_sub_concept.setdefault(sub_concept, []).append(question)
+                by_bucket.setdefault(
+                    (sub_concept, question.get("difficulty")), []
+                ).append(question)
+
+        self.questions = ordered
+        self.by_id = by_id
+        self.positions = positions
+        self.by_sub_concept = by_sub_concept
+        self.by_bucket = by_bucket
+        self.version = version
+        self.loaded = True
+
+    async def load(self, db) -> None:
+        """Load every question from MongoDB and rebuild the indexes."""
+        version = await _read_version(db)
+        questions = await db["questions"].find({}, {"_id": 0}).sort("_id", 1).to_list(None)
+        self.index(questions, version)
+        self._checked_at = time.monotonic()
+
+    async def refresh(self, db) -> None:
+        """Reload when the catalog version document has changed."""
+        if self.loaded and time.monotonic() - self._checked_at < self.check_interval:
+            return
+
+        async with self._lock:
+            if self.loaded and time.monotonic() - self._checked_at < self.check_interval:
+                return
+            if not self.loaded or await _read_version(db) != self.version:
+                await self.load(db)
+            else:
+                self._checked_at = time.monotonic()
+
+    def snapshot(self) -> "QuestionCatalog":
+        """Return a catalog sharing the current indexes that later reloads leave unchanged.
+
+        Reloads replace the indexes rather than mutating them, so positions
+        resolved against a snapshot stay valid across awaits.
+        """
+        snapshot = QuestionCatalog(self.check_interval)
+        snapshot.version = self.version
+        snapshot.loaded = self.loaded
+        snapshot.questions = self.questions
+        snapshot.by_id = self.by_id
+        snapshot.positions = self.positions
+        snapshot.by_sub_concept = self.by_sub_concept
+        snapshot.by_bucket = self.by_bucket
+        snapshot._checked_at = self._checked_at
+        return snapshot
+
+    def get(self, question_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return the question with the given id, if any."""
+        return self.by_id.get(question_id) if question_id else None
+
+    def for_sub_concept(self, sub_concept: str) -> List[Dict[str, Any]]:
+        """Return every question for a sub-concept in catalog order."""
+        return self.by_sub_concept.get(sub_concept, [])
+
+    def for_bucket(self, sub_concept: str, difficulty: int) -> List[Dict[str, Any]]:
+        """Return every question for a sub-concept and difficulty in catalog order."""
+        return self.by_bucket.get((sub_concept, difficulty), [])
+
+    def merge(self, responses: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Join responses with the question fields used for scoring."""
+        merged: List[Dict[str, Any]] = []
+        for response in responses:
+            question = self.by_id.get(response.get("question_id"))
+            if not question:
+                continue
+            merged.append(
+                {
+                    **response,
+                    "difficulty": question.get("difficulty"),
+                    "expected_time": question.get("expected_time"),
+                    "sub_concept": question.get("sub_concept"),
+                    "difficulty_rating": question.get("difficulty_rating"),
+                }
+            )
+        return merged
+
+
+async def _read_version(db) -> Optional[int]:
+    document = await db[CATALOG_META_COLLECTION].find_one({"_id": CATALOG_VERSION_ID})
+    return document.get("version") if document else None
+
+
+async def bump_catalog_version(db) -> int:
+    """Increment the catalog version so every process reloads its cache."""
+    document = await db[CATALOG_META_COLLECTION].find_one_and_update(
+        {"_id": CATALOG_VERSION_ID},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return int(document["version"])
+
+
+_catalog = QuestionCatalog()
+
+
+async def get_catalog(db) -> QuestionCatalog:
+    """Return the shared catalog, reloading it if the version has changed."""
+    await _catalog.refresh(db)
+    return _catalog
@@ -0,0 +1,131 @@
+"""Adaptive quiz assembly over the in-process question catalog."""
+
+import random
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from services.question_catalog import QuestionCatalog
+
+QUIZ_SIZE = 10
+
+# (sub_concept, easy_count, medium_count, hard_count, total_count)
+Bucket = Tuple[str, int, int, int, int]
+
+
+def difficulty_ratios(mastery_value: float) -> Tuple[float, float, float]:
+    """Return the easy/medium/hard split for a sub-concept's mastery."""
+    if mastery_value < 40:
+        return 0.6, 0.3, 0.1
+    if mastery_value < 80:
+        return 0.4, 0.4, 0.2
+    return 0.2, 0.5, 0.3
+
+
+def plan_allocations(
+    weak_areas: List[Dict[str, Any]],
+    subconcept_results: Dict[str, Dict[str, Any]],
+    size: int = QUIZ_SIZE,
+) -> List[Bucket]:
+    """Split the quiz across weak sub-concepts and difficulties by weakness share."""
+    weakness_scores = [
+        {
+            "sub_concept": area["sub_concept"],
+            "weakness_score": 100.0 - float(area.get("mastery_score", 0.0)),
+        }
+        for area in weak_areas
+    ]
+
+    total_weakness = sum(item["weakness_score"] for item in weakness_scores)
+    if total_weakness <= 0:
+        return []
+
+    allocations: Dict[str, int] = {}
+    for item in weakness_scores:
+        share = (item["weakness_score"] / total_weakness) * size
+        allocations[item["sub_concept"]] = max(1, int(round(share)))
+
+    allocated_total = sum(allocations.values())
+    if allocated_total != size:
+        sorted_by_weakness = sorted(
+            weakness_scores, key=lambda entry: entry["weakness_score"], reverse=True
+        )
+        while allocated_total > size:
+            for entry in sorted_by_weakness:
+                sub_concept = entry["sub_concept"]
+                if allocations[sub_concept] > 1:
+                    allocations[sub_concept] -= 1
+                    allocated_total -= 1
+                    break
+        while allocated_total < size:
+            sub_concept = sorted_by_weakness[0]["sub_concept"]
+            allocations[sub_concept] += 1
+            allocated_total += 1
+
+    plan: List[Bucket] = []
+    for sub_concept, count in allocations.items():
+        result = subconcept_results.get(sub_concept, {})
+        mastery_score = result.get("mastery_score")
+        mastery_value = float(mastery_score) if mastery_score is not None else 0.0
+
+        easy_ratio, medium_ratio, _ = difficulty_ratios(mastery_value)
+        easy_count = int(round(count * easy_ratio))
+        medium_count = int(round(count * medium_ratio))
+        hard_count = count - easy_count - medium_count
+        plan.append((sub_concept, easy_count, medium_count, hard_count, count))
+
+    return plan
+
+
+def public_view(question: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of a question without its answer."""
+    return {key: value for key, value in question.items() if key != "correct_option"}
+
+
+class QuizAssembler:
+    """Fill an allocation plan from the catalog in a single in-memory pass."""
+
+    def __init__(
+        self,
+        catalog: QuestionCatalog,
+        rng: Optional[random.Random] = None,
+        exclude: Optional[Iterable[str]] = None,
+    ) -> None:
+        self.catalog = catalog
+        self.rng = rng or random.Random()
+        self.exclude: Set[str] = set(exclude or ())
+        self.selected: List[Dict[str, Any]] = []
+        self.selected_ids: Set[str] = set()
+
+    def _take(self, candidates: List[Dict[str, Any]], size: int) -> int:
+        """Add up to `size` random unselected candidates, returning how many were added."""
+        if size <= 0:
+            return 0
+        pool = [
+            question
+            for question in candidates
+            if question["question_id"] not in self.selected_ids
+            and question["question_id"] not in self.exclude
+        ]
+        picked = self.rng.sample(pool, min(size, len(pool)))
+        for question in picked:
+            self.selected_ids.add(question["question_id"])
+            self.selected.append(question)
+        return len(picked)
+
+    def select(self, plan: Iterable[Bucket], size: int = QUIZ_SIZE) -> List[Dict[str, Any]]:
+        """Fill every bucket of the plan, topping up from wider pools when short."""
+        for sub_concept, easy_count, medium_count, hard_count, count in plan:
+            added = self._take(self.catalog.for_bucket(sub_concept, 1), easy_count)
+            added += self._take(self.catalog.for_bucket(sub_concept, 2), medium_count)
+            added += self._take(self.catalog.for_bucket(sub_concept, 3), hard_count)
+            self._take(self.catalog.for_sub_concept(sub_concept), count - added)
+
+        self._take(self.catalog.questions, size - len(self.selected))
+        return self.selected[:size]
+
+    def assemble(self, plan: Iterable[Bucket], size: int = QUIZ_SIZE) -> List[Dict[str, Any]]:
+        """Return the plan's quiz with answers stripped."""
+        return [public_view(question) for question in self.select(plan, size)]
+
+    def random_quiz(self, size: int = QUIZ_SIZE) -> List[Dict[str, Any]]:
+        """Return a uniformly sampled quiz for users without usable history."""
+        return self.assemble([], size)
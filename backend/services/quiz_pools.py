@@ -0,0 +1,152 @@
+"""Pre-assembled quizzes kept per allocation plan."""
+
+import asyncio
+import random
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from config import QUIZ_EXCLUDE_RECENT, QUIZ_POOL_MAX_PROFILES, QUIZ_POOL_SIZE
+from services.question_catalog import QuestionCatalog
+from services.quiz_assembler import QUIZ_SIZE, Bucket, QuizAssembler, public_view
+
+# An allocation plan identifies an adaptive profile: the weak sub-concepts,
+# their question counts, and the difficulty split of their mastery band.
+# The empty plan is the profile of users without usable history.
+Profile = Tuple[Bucket, ...]
+
+
+async def load_recent_question_ids(db, user_id: str, limit: int = QUIZ_EXCLUDE_RECENT) -> Set[str]:
+    """Return the questions a user answered most recently."""
+    if limit <= 0:
+        return set()
+    documents = await db["user_responses"].find(
+        {"user_id": user_id}, {"_id": 0, "question_id": 1}
+    ).sort("timestamp", -1).limit(limit).to_list(None)
+    return {document["question_id"] for document in documents}
+
+
+class QuizPool:
+    """Rings of ready quizzes per profile, refilled off the request path.
+
+    Each quiz is served once. Serving a quiz schedules a refill of its ring
+    on the event loop, so requests only pay for popping a quiz and swapping
+    out any recently answered questions.
+    """
+
+    def __init__(
+        self,
+        capacity: int = QUIZ_POOL_SIZE,
+        max_profiles: int = QUIZ_POOL_MAX_PROFILES,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.capacity = capacity
+        self.max_profiles = max_profiles
+        self.rng = rng or random.Random()
+        self.hits = 0
+        self.misses = 0
+        self._rings: "OrderedDict[Profile, Deque[List[Dict[str, Any]]]]" = OrderedDict()
+        self._pending: Set[Profile] = set()
+        self._catalog: Optional[QuestionCatalog] = None
+        self._version: Optional[int] = None
+
+    def _assemble(self, profile: Profile) -> List[Dict[str, Any]]:
+        return QuizAssembler(self._catalog, self.rng).assemble(profile, QUIZ_SIZE)
+
+    def _sync_catalog(self, catalog: QuestionCatalog) -> None:
+        """Drop every ring assembled from an older catalog."""
+        if catalog is not self._catalog or catalog.version != self._version:
+            self._catalog = catalog
+            self._version = catalog.version
+            self._rings.clear()
+
+    def _refill(self, profile: Profile) -> None:
+        self._pending.discard(profile)
+        ring = self._rings.get(profile)
+        if ring is None or self._catalog is None:
+            return
+        while len(ring) < self.capacity:
+            ring.append(self._assemble(profile))
+
+    def _schedule_refill(self, profile: Profile) -> None:
+        if profile in self._pending:
+            return
+        self._pending.add(profile)
+        asyncio.get_running_loop().call_soon(self._refill, profile)
+
+    def warm(self, catalog: QuestionCatalog, profiles: Iterable[Profile] = ((),)) -> None:
+        """Fill rings ahead of the first request."""
+        if self.capacity <= 0:
+            return
+        self._sync_catalog(catalog)
+        for profile in profiles:
+            self._rings.setdefault(profile, deque())
+            self._refill(profile)
+
+    def serve(
+        self,
+        catalog: QuestionCatalog,
+        plan: Iterable[Bucket] = (),
+        exclude: Optional[Set[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return a quiz for the plan, avoiding excluded questions where possible."""
+        profile: Profile = tuple(plan)
+        self._sync_catalog(catalog)
+        if self.capacity <= 0:
+            quiz = self._assemble(profile)
+        else:
+            ring = self._rings.get(profile)
+            if ring is None:
+                ring = self._rings[profile] = deque()
+                while len(self._rings) > self.max_profiles:
+                    self._rings.popitem(last=False)
+            self._rings.move_to_end(profile)
+
+            if ring:
+                self.hits += 1
+                quiz = ring.popleft()
+            else:
+                self.misses += 1
+                quiz = self._assemble(profile)
+            self._schedule_refill(profile)
+
+        if exclude:
+            quiz = self._swap_excluded(quiz, exclude)
+        return quiz
+
+    def _swap_excluded(
+        self, quiz: List[Dict[str, Any]], exclude: Set[str]
+    ) -> List[Dict[str, Any]]:
+        """Replace excluded questions with others from the same bucket.
+
+        A question is kept when its bucket has no alternative, so the quiz
+        never comes back short.
+        """
+        chosen = {question["question_id"] for question in quiz}
+        swapped = []
+        for question in quiz:
+            if question["question_id"] in exclude:
+                candidates = [
+                    candidate
+                    for candidate in self._catalog.for_bucket(
+                        question.get("sub_concept"), question.get("difficulty")
+                    )
+                    if candidate["question_id"] not in exclude
+                    and candidate["question_id"] not in chosen
+                ]
+                if candidates:
+                    replacement = self.rng.choice(candidates)
+                    chosen.add(replacement["question_id"])
+                    question = public_view(replacement)
+            swapped.append(question)
+        return swapped
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "profiles": len(self._rings)}
+
+
+_quiz_pool = QuizPool()
+
+
+def get_quiz_pool() -> QuizPool:
+    """Return the shared quiz pool."""
+    return _quiz_pool
@@ -1,44 +1,94 @@
-async def generate_recommendations(weak_areas: list, db):
-    if not weak_areas:
-        return []
-
-    recommendations = []
-    allowed_statuses = {"Critical", "Weak", "Moderate"}
+PRACTICE_LIMITS = {"easy": (1, 5), "medium": (2, 3), "hard": (3, 1)}
+ALLOWED_STATUSES = {"Critical", "Weak", "Moderate"}
 
-    for area in weak_areas:
-        if area.get("status") not in allowed_statuses:
-            continue
-        sub_concept = area.get("sub_concept")
-        if not sub_concept:
-            continue
 
-        easy = await db.questions.find(
-            {"sub_concept": sub_concept, "difficulty": 1}
-        ).to_list(length=5)
+def _eligible_sub_concepts(weak_areas: list):
+    return [
+        area
+        for area in weak_areas or []
+        if area.get("status") in ALLOWED_STATUSES and area.get("sub_concept")
+    ]
 
-        medium = await db.questions.find(
-            {"sub_concept": sub_concept, "difficulty": 2}
-        ).to_list(length=3)
 
-        hard = await db.questions.find(
-            {"sub_concept": sub_concept, "difficulty": 3}
-        ).to_list(length=1)
-
-        # REMOVE _id from documents
-        for group in (easy, medium, hard):
-            for doc in group:
-                doc.pop("_id", None)
+def _build_recommendations(areas: list, buckets: dict):
+    recommendations = []
+    for area in areas:
+        sub_concept = area["sub_concept"]
+        practice_questions = {}
+        for label, (difficulty, limit) in PRACTICE_LIMITS.items():
+            # Copies keep callers from mutating the shared catalog
+            practice_questions[label] = [
+                dict(doc) for doc in buckets.get((sub_concept, difficulty), [])[:limit]
+            ]
 
         recommendations.append(
             {
                 "sub_concept": sub_concept,
                 "classification": area.get("status"),
-                "practice_questions": {
-                    "easy": easy,
-                    "medium": medium,
-                    "hard": hard,
-                },
+                "practice_questions": practice_questions,
             }
         )
 
-    return recommendations
\ No newline at end of file
+    return recommendations
+
+
+def generate_recommendations(weak_areas: list, catalog):
+    areas = _eligible_sub_concepts(weak_areas)
+    if not areas:
+        return []
+
+    buckets = {}
+    for area in areas:
+        for difficulty, _ in PRACTICE_LIMITS.values():
+            key = (area["sub_concept"], difficulty)
+            buckets[key] = catalog.for_bucket(*key)
+
+    return _build_recommendations(areas, buckets)
+
+
+def practice_questions_pipeline(sub_concepts: list):
+    # One query for every weak sub-concept: rank questions within each
+    # (sub_concept, difficulty) bucket and keep the first N of each.
+    limit_by_difficulty = {
+        "$switch": {
+            "branches": [
+                {"case": {"$eq": ["$difficulty", difficulty]}, "then": limit}
+                for difficulty, limit in PRACTICE_LIMITS.values()
+            ],
+            "default": 0,
+        }
+    }
+    return [
+        {
+            "$match": {
+                "sub_concept": {"$in": sub_concepts},
+                "difficulty": {"$in": [difficulty for difficulty, _ in PRACTICE_LIMITS.values()]},
+            }
+        },
+        {
+            "$setWindowFields": {
+                "partitionBy": {"sub_concept": "$sub_concept", "difficulty": "$difficulty"},
+                "sortBy": {"_id": 1},
+                "output": {"rank": {"$documentNumber": {}}},
+            }
+        },
+        {"$match": {"$expr": {"$lte": ["$rank", limit_by_difficulty]}}},
+        {"$sort": {"_id": 1}},
+        {"$project": {"_id": 0, "rank": 0}},
+    ]
+
+
+async def generate_recommendations_from_db(weak_areas: list, db):
+    areas = _eligible_sub_concepts(weak_areas)
+    if not areas:
+        return []
+
+    documents = await db.questions.aggregate(
+        practice_questions_pipeline([area["sub_concept"] for area in areas])
+    ).to_list(None)
+
+    buckets = {}
+    for doc in documents:
+        buckets.setdefault((doc["sub_concept"], doc["difficulty"]), []).append(doc)
+
+    return _build_recommendations(areas, buckets)
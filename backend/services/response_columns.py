@@ -0,0 +1,69 @@
+"""Compact columnar storage of response histories for scoring."""
+
+from array import array
+
+from services.question_catalog import QuestionCatalog
+from services.response_stats import SCORING_PROJECTION, STREAM_BATCH_SIZE
+
+MAX_TIME_TAKEN = 0xFFFF
+MAX_ATTEMPTS = 0xFF
+
+
+class ResponseColumns:
+    """A history's scoring fields as typed arrays, about 8 bytes per response.
+
+    Questions are referenced by their position in the catalog, so the
+    difficulty, expected time and sub-concept are read from the catalog
+    instead of being copied into every response. Time is clamped to uint16
+    seconds and attempts to uint8.
+    """
+
+    __slots__ = ("question_index", "correct", "time_taken", "attempts")
+
+    def __init__(self) -> None:
+        self.question_index = array("I")
+        self.correct = array("B")
+        self.time_taken = array("H")
+        self.attempts = array("B")
+
+    def __len__(self) -> int:
+        return len(self.question_index)
+
+    def append(self, question_index: int, is_correct: bool, time_taken: int, attempts: int) -> None:
+        self.question_index.append(question_index)
+        self.correct.append(1 if is_correct else 0)
+        self.time_taken.append(min(max(int(time_taken), 0), MAX_TIME_TAKEN))
+        self.attempts.append(min(max(int(attempts), 0), MAX_ATTEMPTS))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            len(column) * column.itemsize
+            for column in (self.question_index, self.correct, self.time_taken, self.attempts)
+        )
+
+
+async def load_response_columns(
+    db, user_id: str, catalog: QuestionCatalog, batch_size: int = STREAM_BATCH_SIZE
+) -> ResponseColumns:
+    """Load a user's time-ordered history, keeping only the scoring fields.
+
+    Question positions refer to `catalog.questions`; pass a snapshot when the
+    columns are scored after further awaits.
+    """
+    columns = ResponseColumns()
+    cursor = db["user_responses"].find(
+        {"user_id": user_id}, SCORING_PROJECTION
+    ).sort("timestamp", 1).batch_size(batch_size)
+
+    positions = catalog.positions
+    async for response in cursor:
+        question_index = positions.get(response.get("question_id"))
+        if question_index is not None:
+            columns.append(
+                question_index,
+                bool(response.get("is_correct")),
+                response.get("time_taken") or 0,
+                response.get("attempts") or 0,
+            )
+    return columns
@@ -0,0 +1,129 @@
+"""Per-sub-concept response statistics, aggregated in MongoDB or streamed."""
+
+from typing import Any, Dict, List
+
+from services.question_catalog import QuestionCatalog
+from services.scoring_engine import TOTAL_FIELDS, accumulate_values, empty_totals
+
+STREAM_BATCH_SIZE = 1000
+SCORING_PROJECTION = {"_id": 0, "question_id": 1, "is_correct": 1, "time_taken": 1, "attempts": 1}
+
+
+def subconcept_totals_pipeline(user_id: str) -> List[Dict[str, Any]]:
+    """Build a pipeline reducing a user's responses to mastery sufficient statistics.
+
+    The output has one document per sub-concept carrying exactly the running
+    sums consumed by `compute_mastery_from_totals`; raw responses never leave
+    the server.
+    """
+    expected_time = {"$toInt": {"$ifNull": ["$question.expected_time", 0]}}
+    time_ratio = {"$divide": [{"$toInt": {"$ifNull": ["$time_taken", 0]}}, "$expected_time"]}
+    return [
+        {"$match": {"user_id": user_id}},
+        {"$sort": {"timestamp": 1}},
+        {"$project": SCORING_PROJECTION},
+        {
+            "$lookup": {
+                "from": "questions",
+                "localField": "question_id",
+                "foreignField": "question_id",
+                "pipeline": [
+                    {"$project": {"_id": 0, "sub_concept": 1, "difficulty": 1, "expected_time": 1}}
+                ],
+                "as": "question",
+            }
+        },
+        {"$unwind": "$question"},
+        {"$match": {"question.sub_concept": {"$nin": [None, ""]}}},
+        {
+            "$project": {
+                "sub_concept": "$question.sub_concept",
+                "correct": {"$cond": ["$is_correct", 1, 0]},
+                "difficulty": {"$toInt": {"$ifNull": ["$question.difficulty", 0]}},
+                "attempts": {"$toInt": {"$ifNull": ["$attempts", 0]}},
+                "time_taken": 1,
+                "expected_time": expected_time,
+            }
+        },
+        {
+            "$addFields": {
+                "timed": {"$cond": [{"$gt": ["$expected_time", 0]}, 1, 0]},
+                "time_score": {
+                    "$cond": [
+                        {"$gt": ["$expected_time", 0]},
+                        {
+                            "$switch": {
+                                "branches": [
+                                    {"case": {"$lte": [time_ratio, 1]}, "then": 1.0},
+                                    {
+                                        "case": {"$lte": [time_ratio, 2]},
+                                        "then": {"$subtract": [1.0, {"$subtract": [time_ratio, 1.0]}]},
+                                    },
+                                ],
+                                "default": 0.0,
+                            }
+                        },
+                        0.0,
+                    ]
+                },
+            }
+        },
+        {
+            "$group": {
+                "_id": "$sub_concept",
+                "total_attempts": {"$sum": 1},
+                "correct_count": {"$sum": "$correct"},
+                "difficulty_attempted": {"$sum": "$difficulty"},
+                "difficulty_correct": {"$sum": {"$multiply": ["$correct", "$difficulty"]}},
+                "time_score_sum": {"$sum": "$time_score"},
+                "time_score_count": {"$sum": "$timed"},
+                "attempts_sum": {"$sum": "$attempts"},
+            }
+        },
+    ]
+
+
+async def aggregate_subconcept_totals(db, user_id: str) -> Dict[str, Dict[str, Any]]:
+    """Return a user's running sums keyed by sub-concept, computed inside MongoDB."""
+    documents = await db["user_responses"].aggregate(
+        subconcept_totals_pipeline(user_id)
+    ).to_list(None)
+    return {
+        document["_id"]: {field: document[field] for field in TOTAL_FIELDS}
+        for document in documents
+    }
+
+
+async def stream_subconcept_totals(
+    db, user_id: str, catalog: QuestionCatalog, batch_size: int = STREAM_BATCH_SIZE
+) -> Dict[str, Dict[str, Any]]:
+    """Fold a user's responses into running sums one cursor batch at a time.
+
+    Only the current batch is held in memory, so peak usage does not grow
+    with the length of the user's history.
+    """
+    grouped: Dict[str, Dict[str, Any]] = {}
+    cursor = db["user_responses"].find(
+        {"user_id": user_id}, SCORING_PROJECTION
+    ).sort("timestamp", 1).batch_size(batch_size)
+
+    async for response in cursor:
+        question = catalog.get(response.get("question_id"))
+        if not question:
+            continue
+        sub_concept = question.get("sub_concept")
+        if not sub_concept:
+            continue
+        totals = grouped.get(sub_concept)
+        if totals is None:
+            totals = grouped[sub_concept] = empty_totals()
+        accumulate_values(
+            totals,
+            bool(response.get("is_correct")),
+            int(question.get("difficulty", 0)),
+            int(response.get("time_taken", 0)),
+            int(question.get("expected_time", 0)),
+            int(response.get("attempts", 0)),
+        )
+
+    return grouped
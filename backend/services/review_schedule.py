@@ -0,0 +1,133 @@
+"""SM-2 spaced-repetition state per user and question."""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List
+
+from pymongo import UpdateOne
+
+from constants import (
+    REVIEW_FAILED_GRADE,
+    REVIEW_INITIAL_EASE,
+    REVIEW_MIN_EASE,
+    REVIEW_PASSING_GRADE,
+)
+
+REVIEW_STATE_COLLECTION = "user_review_state"
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def review_grade(response: Dict[str, Any]) -> int:
+    """Grade a merged response on SM-2's 0-5 scale from correctness and speed."""
+    if not response.get("is_correct"):
+        return REVIEW_FAILED_GRADE
+    expected_time = response.get("expected_time") or 0
+    time_taken = response.get("time_taken") or 0
+    if not expected_time or time_taken <= expected_time:
+        return 5
+    if time_taken <= 2 * expected_time:
+        return 4
+    return REVIEW_PASSING_GRADE
+
+
+def ease_change(grade: int) -> float:
+    """Return SM-2's ease adjustment for a grade."""
+    misses = 5 - grade
+    return 0.1 - misses * (0.08 + misses * 0.02)
+
+
+def empty_review() -> Dict[str, Any]:
+    """Return the state of a question the user has never answered."""
+    return {"ease": REVIEW_INITIAL_EASE, "interval_days": 0, "repetitions": 0, "lapses": 0}
+
+
+def update_review(state: Dict[str, Any], response: Dict[str, Any]) -> None:
+    """Apply one SM-2 step for a merged response in place."""
+    grade = review_grade(response)
+    if grade >= REVIEW_PASSING_GRADE:
+        if state["repetitions"] == 0:
+            state["interval_days"] = 1
+        elif state["repetitions"] == 1:
+            state["interval_days"] = 6
+        else:
+            state["interval_days"] = round(state["interval_days"] * state["ease"])
+        state["repetitions"] += 1
+    else:
+        state["interval_days"] = 1
+        state["repetitions"] = 0
+        state["lapses"] += 1
+    state["ease"] = max(REVIEW_MIN_EASE, state["ease"] + ease_change(grade))
+    state["last_reviewed_at"] = response["timestamp"]
+    state["due_at"] = response["timestamp"] + timedelta(days=state["interval_days"])
+
+
+def _review_step(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Express `update_review` as an update pipeline so it runs without a read."""
+    grade = review_grade(response)
+    if grade >= REVIEW_PASSING_GRADE:
+        scheduled = {
+            "interval_days": {
+                "$switch": {
+                    "branches": [
+                        {"case": {"$eq": ["$repetitions", 0]}, "then": 1},
+                        {"case": {"$eq": ["$repetitions", 1]}, "then": 6},
+                    ],
+                    "default": {"$round": [{"$multiply": ["$interval_days", "$ease"]}, 0]},
+                }
+            },
+            "repetitions": {"$add": ["$repetitions", 1]},
+        }
+    else:
+        scheduled = {
+            "interval_days": 1,
+            "repetitions": 0,
+            "lapses": {"$add": ["$lapses", 1]},
+        }
+    reviewed_at = response["timestamp"]
+    return [
+        {
+            "$set": {
+                "ease": {"$ifNull": ["$ease", REVIEW_INITIAL_EASE]},
+                "interval_days": {"$ifNull": ["$interval_days", 0]},
+                "repetitions": {"$ifNull": ["$repetitions", 0]},
+                "lapses": {"$ifNull": ["$lapses", 0]},
+            }
+        },
+        {
+            "$set": {
+                **scheduled,
+                "ease": {"$max": [REVIEW_MIN_EASE, {"$add": ["$ease", ease_change(grade)]}]},
+                "last_reviewed_at": reviewed_at,
+                "updated_at": "$$NOW",
+            }
+        },
+        {
+            "$set": {
+                "due_at": {"$add": [reviewed_at, {"$multiply": ["$interval_days", DAY_MS]}]},
+            }
+        },
+    ]
+
+
+def build_review_updates(
+    user_id: str, responses: Iterable[Dict[str, Any]]
+) -> List[UpdateOne]:
+    """Build one constant-time upsert per response; apply them in order."""
+    return [
+        UpdateOne(
+            {"user_id": user_id, "question_id": response["question_id"]},
+            _review_step(response),
+            upsert=True,
+        )
+        for response in responses
+        if response.get("question_id")
+    ]
+
+
+async def load_due_reviews(
+    db, user_id: str, now: datetime, limit: int
+) -> List[Dict[str, Any]]:
+    """Return a user's most overdue reviews with one range scan of (user_id, due_at)."""
+    return await db[REVIEW_STATE_COLLECTION].find(
+        {"user_id": user_id, "due_at": {"$lte": now}},
+        {"_id": 0, "question_id": 1, "due_at": 1},
+    ).sort("due_at", 1).limit(limit).to_list(None)
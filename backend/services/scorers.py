@@ -0,0 +1,107 @@
+"""Pluggable mastery scorers selected by SCORING_MODE."""
+
+import asyncio
+from typing import Any, Dict, List
+
+from config import SCORING_MODE
+from services.ability_scoring import (
+    ABILITY_STATE_COLLECTION,
+    ability_result,
+    build_ability_updates,
+    empty_ability,
+    group_abilities_from_columns,
+    load_abilities,
+    update_ability,
+)
+from services.instrumentation import timed
+from services.mastery_state import (
+    MASTERY_STATE_COLLECTION,
+    build_state_updates,
+    group_totals,
+    load_totals,
+    results_from_totals,
+)
+from services.question_catalog import QuestionCatalog
+from services.response_columns import load_response_columns
+from services.scoring_executor import get_scoring_executor
+from services.scoring_engine import accumulate_response, compute_mastery_from_totals, empty_totals
+from services.state_backfills import is_backfilled
+
+
+class WeightedScorer:
+    """The blended accuracy/difficulty/time/consistency formula over running sums."""
+
+    name = "weighted"
+    collection = MASTERY_STATE_COLLECTION
+    ordered = False
+
+    def new_state(self) -> Dict[str, Any]:
+        return empty_totals()
+
+    def update(self, state: Dict[str, Any], response: Dict[str, Any]) -> None:
+        accumulate_response(state, response)
+
+    def result(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return compute_mastery_from_totals(state)
+
+    def build_updates(self, user_id: str, merged: List[Dict[str, Any]]) -> list:
+        return build_state_updates(user_id, group_totals(merged))
+
+    async def load_results(
+        self, db, user_id: str, catalog: QuestionCatalog
+    ) -> Dict[str, Dict[str, Any]]:
+        totals = await load_totals(db, user_id, catalog)
+        with timed("scoring"):
+            return results_from_totals(totals)
+
+
+class EloScorer:
+    """Online ability estimates updated in constant time per response."""
+
+    name = "elo"
+    collection = ABILITY_STATE_COLLECTION
+    # Elo steps depend on the current estimate, so they must apply in sequence.
+    ordered = True
+
+    def new_state(self) -> Dict[str, Any]:
+        return empty_ability()
+
+    def update(self, state: Dict[str, Any], response: Dict[str, Any]) -> None:
+        update_ability(state, response)
+
+    def result(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return ability_result(state)
+
+    def build_updates(self, user_id: str, merged: List[Dict[str, Any]]) -> list:
+        return build_ability_updates(user_id, merged)
+
+    async def load_results(
+        self, db, user_id: str, catalog: QuestionCatalog
+    ) -> Dict[str, Dict[str, Any]]:
+        # Column positions index the question list, so the history is loaded
+        # and scored against one snapshot even if the catalog reloads meanwhile.
+        catalog = catalog.snapshot()
+        states, complete = await asyncio.gather(
+            load_abilities(db, user_id), is_backfilled(db, user_id, self.collection)
+        )
+        if not complete:
+            # Users with history from before Elo scoring was enabled are
+            # replayed on read until replay_scorers.py --apply stores them.
+            columns = await load_response_columns(db, user_id, catalog)
+            with timed("scoring"):
+                states = await get_scoring_executor().score(
+                    group_abilities_from_columns, columns, catalog
+                )
+        with timed("scoring"):
+            return {sub_concept: self.result(state) for sub_concept, state in states.items()}
+
+
+SCORERS = {scorer.name: scorer for scorer in (WeightedScorer(), EloScorer())}
+
+
+def get_scorer(name: str = SCORING_MODE):
+    """Return the configured scorer."""
+    try:
+        return SCORERS[name]
+    except KeyError as exc:
+        raise RuntimeError(f"Unknown SCORING_MODE {name!r}; expected one of {sorted(SCORERS)}") from exc
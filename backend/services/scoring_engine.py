@@ -1,6 +1,6 @@
 """Scoring engine for mastery computation."""
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from constants import (
     ACCURACY_WEIGHT,
@@ -14,47 +14,132 @@ from constants import (
 )
 
 
-def compute_subconcept_mastery(responses: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Compute mastery as a weighted blend of accuracy, difficulty, time, and consistency."""
-    total_attempts = len(responses)
+TOTAL_FIELDS = (
+    "total_attempts",
+    "correct_count",
+    "difficulty_attempted",
+    "difficulty_correct",
+    "time_score_sum",
+    "time_score_count",
+    "attempts_sum",
+)
+
+
+def empty_totals() -> Dict[str, Any]:
+    """Return zeroed running sums for a single sub-concept."""
+    totals: Dict[str, Any] = {field: 0 for field in TOTAL_FIELDS}
+    totals["time_score_sum"] = 0.0
+    return totals
+
+
+def compute_time_score(time_taken: int, expected_time: int) -> Optional[float]:
+    """Score time efficiency relative to expected time, or None if unknown."""
+    if expected_time <= 0:
+        return None
+    time_ratio = time_taken / expected_time
+
+    if time_ratio <= 1:
+        return 1.0
+    if time_ratio <= 2:
+        return 1.0 - (time_ratio - 1.0)
+    return 0.0
+
+
+def accumulate_values(
+    totals: Dict[str, Any],
+    is_correct: bool,
+    difficulty: int,
+    time_taken: int,
+    expected_time: int,
+    attempts: int,
+) -> None:
+    """Fold one response's scoring signals into the running sums in place."""
+    totals["total_attempts"] += 1
+    totals["difficulty_attempted"] += difficulty
+    if is_correct:
+        totals["correct_count"] += 1
+        totals["difficulty_correct"] += difficulty
+
+    time_score = compute_time_score(time_taken, expected_time)
+    if time_score is not None:
+        totals["time_score_sum"] += time_score
+        totals["time_score_count"] += 1
+
+    totals["attempts_sum"] += attempts
+
+
+def accumulate_response(totals: Dict[str, Any], response: Dict[str, Any]) -> None:
+    """Fold a single merged response into the running sums in place."""
+    accumulate_values(
+        totals,
+        bool(response.get("is_correct")),
+        int(response.get("difficulty", 0)),
+        int(response.get("time_taken", 0)),
+        int(response.get("expected_time", 0)),
+        int(response.get("attempts", 0)),
+    )
+
+
+def group_totals_from_columns(
+    columns, questions: List[Dict[str, Any]]
+) -> Dict[str, Dict[str, Any]]:
+    """Fold a ResponseColumns history into running sums keyed by sub-concept."""
+    grouped: Dict[str, Dict[str, Any]] = {}
+    for question_index, is_correct, time_taken, attempts in zip(
+        columns.question_index, columns.correct, columns.time_taken, columns.attempts
+    ):
+        question = questions[question_index]
+        sub_concept = question.get("sub_concept")
+        if not sub_concept:
+            continue
+        totals = grouped.get(sub_concept)
+        if totals is None:
+            totals = grouped[sub_concept] = empty_totals()
+        accumulate_values(
+            totals,
+            bool(is_correct),
+            int(question.get("difficulty", 0)),
+            time_taken,
+            int(question.get("expected_time", 0)),
+            attempts,
+        )
+    return grouped
+
+
+def summarize_responses(responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reduce merged responses to the sufficient statistics of the mastery formula."""
+    totals = empty_totals()
+    for response in responses:
+        accumulate_response(totals, response)
+    return totals
+
+
+def compute_mastery_from_totals(totals: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute mastery from running sums produced by `summarize_responses`.
+
+    Sums may be fractional when responses are weighted (e.g. time decay); the
+    three-attempt threshold then applies to the effective attempt count.
+    """
+    total_attempts = totals.get("total_attempts", 0)
     if total_attempts < 3:
         return {"status": "Insufficient Data", "mastery_score": None}
 
-    correct_count = sum(1 for response in responses if response.get("is_correct"))
-    difficulty_attempted = sum(int(response.get("difficulty", 0)) for response in responses)
-    difficulty_correct = sum(
-        int(response.get("difficulty", 0))
-        for response in responses
-        if response.get("is_correct")
-    )
+    correct_count = totals.get("correct_count", 0)
+    difficulty_attempted = totals.get("difficulty_attempted", 0)
+    difficulty_correct = totals.get("difficulty_correct", 0)
+    time_score_count = totals.get("time_score_count", 0)
+    attempts_sum = totals.get("attempts_sum", 0)
 
     accuracy = correct_count / total_attempts if total_attempts else 0.0
     difficulty_weighted_accuracy = (
         difficulty_correct / difficulty_attempted if difficulty_attempted else 0.0
     )
 
-    time_scores = []
-    for response in responses:
-        expected_time = int(response.get("expected_time", 0))
-        if expected_time <= 0:
-            continue
-        time_taken = int(response.get("time_taken", 0))
-        time_ratio = time_taken / expected_time
-
-        if time_ratio <= 1:
-            time_scores.append(1.0)
-        elif time_ratio <= 2:
-            time_scores.append(1.0 - (time_ratio - 1.0))
-        else:
-            time_scores.append(0.0)
-
-    average_time_score = sum(time_scores) / len(time_scores) if time_scores else 0.0
-
-    avg_attempts = (
-        sum(int(response.get("attempts", 0)) for response in responses) / len(responses)
-        if responses
-        else 0.0
+    average_time_score = (
+        totals.get("time_score_sum", 0.0) / time_score_count if time_score_count else 0.0
     )
+
+    avg_attempts = attempts_sum / total_attempts if total_attempts else 0.0
     consistency_score = min(1.0 / avg_attempts, 1.0) if avg_attempts else 0.0
 
     mastery = (
@@ -76,6 +161,11 @@ def compute_subconcept_mastery(responses: List[Dict[str, Any]]) -> Dict[str, Any
     }
 
 
+def compute_subconcept_mastery(responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compute mastery as a weighted blend of accuracy, difficulty, time, and consistency."""
+    return compute_mastery_from_totals(summarize_responses(responses))
+
+
 def compute_concept_mastery(
     subconcept_results: Dict[str, Dict[str, Any]]
 ) -> Dict[str, Any]:
@@ -107,13 +197,14 @@ def compute_concept_mastery(
 def compute_overall_mastery(subconcept_results: Dict[str, Dict[str, Any]]) -> float:
     """Compute overall mastery weighted by total attempts per sub-concept."""
     weighted_sum = 0.0
-    total_attempts = 0
+    total_attempts = 0.0
 
     for result in subconcept_results.values():
         if result.get("status") == "Insufficient Data":
             continue
         mastery_score = result.get("mastery_score")
-        attempts = int(result.get("total_attempts", 0))
+        # Decayed attempt counts are fractional, so keep them as floats.
+        attempts = float(result.get("total_attempts", 0))
         if mastery_score is None or attempts <= 0:
             continue
         weighted_sum += float(mastery_score) * attempts
@@ -125,6 +216,17 @@ def compute_overall_mastery(subconcept_results: Dict[str, Dict[str, Any]]) -> fl
     return weighted_sum / total_attempts
 
 
+def mastery_status(mastery_score: float) -> str:
+    """Classify a mastery score against the configured thresholds."""
+    if mastery_score < CRITICAL_THRESHOLD:
+        return "Critical"
+    if mastery_score < WEAK_THRESHOLD:
+        return "Weak"
+    if mastery_score < MODERATE_THRESHOLD:
+        return "Moderate"
+    return "Strong"
+
+
 def get_top_weak_areas(
     subconcept_results: Dict[str, Dict[str, Any]], top_n: int = 3
 ) -> List[Dict[str, Any]]:
@@ -137,15 +239,7 @@ def get_top_weak_areas(
         if mastery_score is None:
             continue
         mastery_score = float(mastery_score)
-
-        if mastery_score < CRITICAL_THRESHOLD:
-            status = "Critical"
-        elif mastery_score < WEAK_THRESHOLD:
-            status = "Weak"
-        elif mastery_score < MODERATE_THRESHOLD:
-            status = "Moderate"
-        else:
-            status = "Strong"
+        status = mastery_status(mastery_score)
 
         if status == "Strong":
             continue
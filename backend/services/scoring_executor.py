@@ -0,0 +1,107 @@
+"""Run history scoring inline or in a process pool, depending on its size."""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+from config import SCORING_OFFLOAD_THRESHOLD, SCORING_PROCESS_WORKERS
+from services.question_catalog import QuestionCatalog
+from services.response_columns import ResponseColumns
+
+# The only question fields the column scorers read.
+SCORING_QUESTION_FIELDS = ("sub_concept", "difficulty", "expected_time", "difficulty_rating")
+
+ColumnScorer = Callable[[ResponseColumns, List[Dict[str, Any]]], Dict[str, Dict[str, Any]]]
+
+
+def _scoring_questions(catalog: QuestionCatalog) -> List[Dict[str, Any]]:
+    return [
+        {field: question[field] for field in SCORING_QUESTION_FIELDS if field in question}
+        for question in catalog.questions
+    ]
+
+
+class ScoringExecutor:
+    """Scores ResponseColumns histories without stalling the event loop.
+
+    Histories shorter than `threshold` are scored inline, where a process
+    hop would cost more than it saves. Longer ones go to a pool of
+    `workers` processes. The columns pickle as their raw arrays, about 8
+    bytes per response. The catalog is sent as just the fields the scorers
+    read, prepared once per catalog version.
+    """
+
+    def __init__(
+        self,
+        threshold: int = SCORING_OFFLOAD_THRESHOLD,
+        workers: int = SCORING_PROCESS_WORKERS,
+    ) -> None:
+        self.threshold = threshold
+        self.workers = workers
+        self.inline = 0
+        self.offloaded = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._source: Optional[List[Dict[str, Any]]] = None
+        self._questions: List[Dict[str, Any]] = []
+
+    def _pool_for_offload(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned workers do not inherit the event loop or Motor's threads.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def _questions_for(self, catalog: QuestionCatalog) -> List[Dict[str, Any]]:
+        # Reloads replace the question list, so its identity marks a catalog
+        # version and snapshots of the same version share one prepared list.
+        if catalog.questions is not self._source:
+            self._source = catalog.questions
+            self._questions = _scoring_questions(catalog)
+        return self._questions
+
+    async def score(
+        self, scorer: ColumnScorer, columns: ResponseColumns, catalog: QuestionCatalog
+    ) -> Dict[str, Dict[str, Any]]:
+        """Return `scorer(columns, catalog.questions)`, offloading long histories.
+
+        `catalog` must be the snapshot the columns were loaded against.
+        `scorer` must be a module-level function so the pool can pickle it.
+        """
+        if self.workers <= 0 or len(columns) < self.threshold:
+            self.inline += 1
+            return scorer(columns, catalog.questions)
+        self.offloaded += 1
+        loop = asyncio.get_running_loop()
+        questions = self._questions_for(catalog)
+        for attempt in range(2):
+            pool = self._pool_for_offload()
+            try:
+                return await loop.run_in_executor(pool, scorer, columns, questions)
+            except BrokenProcessPool:
+                # A dead worker breaks the pool for good; replace it and retry once.
+                self._discard(pool)
+                if attempt:
+                    raise
+
+    def _discard(self, pool: ProcessPoolExecutor) -> None:
+        pool.shutdown(wait=False, cancel_futures=True)
+        if self._pool is pool:
+            self._pool = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"inline": self.inline, "offloaded": self.offloaded}
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._discard(self._pool)
+
+
+_scoring_executor = ScoringExecutor()
+
+
+def get_scoring_executor() -> ScoringExecutor:
+    """Return the shared scoring executor."""
+    return _scoring_executor
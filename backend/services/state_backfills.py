@@ -0,0 +1,52 @@
+"""Per-user markers for state collections that cover a user's full history."""
+
+from datetime import datetime
+from typing import Iterable, Set
+
+from pymongo import UpdateOne
+
+STATE_BACKFILL_COLLECTION = "user_state_backfills"
+# Rewrites of one user's state retried while live submits keep changing it.
+REBUILD_ATTEMPTS = 3
+
+
+async def mark_backfilled(db, user_ids: Iterable[str], collections: Iterable[str]) -> None:
+    """Record that the given state collections are complete for every user.
+
+    State is complete once rebuilt from history, or when it was created by
+    the user's first submission; readers fall back to raw history until then.
+    """
+    now = datetime.utcnow()
+    fields = {collection: now for collection in collections}
+    updates = [
+        UpdateOne({"_id": user_id}, {"$set": fields}, upsert=True)
+        for user_id in set(user_ids)
+    ]
+    if updates and fields:
+        await db[STATE_BACKFILL_COLLECTION].bulk_write(updates, ordered=False)
+
+
+async def is_backfilled(db, user_id: str, collection: str) -> bool:
+    """Return whether `collection` holds state for all of the user's history."""
+    document = await db[STATE_BACKFILL_COLLECTION].find_one(
+        {"_id": user_id, collection: {"$exists": True}}, {"_id": 1}
+    )
+    return document is not None
+
+
+async def backfilled_users(db, user_ids: Iterable[str], collections: Iterable[str]) -> Set[str]:
+    """Return the users for whom every one of `collections` is complete."""
+    query = {"_id": {"$in": list(user_ids)}}
+    query.update({collection: {"$exists": True} for collection in collections})
+    documents = await db[STATE_BACKFILL_COLLECTION].find(query, {"_id": 1}).to_list(None)
+    return {document["_id"] for document in documents}
+
+
+async def clear_backfilled(db, user_ids: Iterable[str], collections: Iterable[str]) -> None:
+    """Forget that the given state collections are complete, so reads use raw history."""
+    user_ids = list(set(user_ids))
+    fields = {collection: "" for collection in collections}
+    if user_ids and fields:
+        await db[STATE_BACKFILL_COLLECTION].update_many(
+            {"_id": {"$in": user_ids}}, {"$unset": fields}
+        )
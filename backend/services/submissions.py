@@ -0,0 +1,401 @@
+"""Grading and storage of quiz submissions."""
+
+import asyncio
+import contextvars
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pymongo import DeleteOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from pymongo.write_concern import WriteConcern
+
+from config import (
+    SUBMIT_BUFFER_ENABLED,
+    SUBMIT_BUFFER_MAX_BATCH,
+    SUBMIT_BUFFER_MAX_DELAY_MS,
+)
+from services.analytics_cache import bump_user_versions
+from services.mastery_rollups import (
+    DAILY_ROLLUP_COLLECTION,
+    build_rollup_updates,
+    group_daily_totals,
+)
+from services.mastery_state import MASTERY_STATE_COLLECTION, build_state_updates, group_totals
+from services.question_catalog import QuestionCatalog
+from services.review_schedule import REVIEW_STATE_COLLECTION, build_review_updates
+from services.scorers import get_scorer
+from services.state_backfills import backfilled_users, clear_backfilled, mark_backfilled
+
+# Submissions are acknowledged only once journaled on a majority of members.
+DURABLE_WRITES = WriteConcern(w="majority", j=True)
+
+# Client submission ids, keyed by user. An attempt claims its id as pending
+# before writing anything and marks it applied once state has been updated.
+SUBMISSION_LEDGER_COLLECTION = "quiz_submissions"
+DUPLICATE_KEY = 11000
+# A pending claim older than this belongs to an attempt that died.
+SUBMISSION_CLAIM_TIMEOUT = timedelta(seconds=60)
+
+
+def grade_submission(
+    catalog: QuestionCatalog,
+    user_id: str,
+    responses: List[Any],
+    submission_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Grade responses against the catalog and build the documents to store.
+
+    With a client `submission_id`, each document is keyed by the id and its
+    position so a retried submission cannot insert the responses twice.
+    """
+    documents: List[Dict[str, Any]] = []
+    merged: List[Optional[Dict[str, Any]]] = []
+    correct_answers = 0
+    for position, response in enumerate(responses):
+        question = catalog.get(response.question_id) or {}
+        correct_option = question.get("correct_option")
+        is_correct = response.selected_option == correct_option
+        if is_correct:
+            correct_answers += 1
+        document = {
+            "user_id": user_id,
+            "question_id": response.question_id,
+            "is_correct": is_correct,
+            "time_taken": response.time_taken,
+            "attempts": 1,
+            "timestamp": datetime.utcnow(),
+        }
+        if submission_id:
+            document["submission_id"] = submission_id
+            document["position"] = position
+        documents.append(document)
+        merged.append(
+            {
+                **document,
+                "difficulty": question.get("difficulty"),
+                "expected_time": question.get("expected_time"),
+                "sub_concept": question.get("sub_concept"),
+                "difficulty_rating": question.get("difficulty_rating"),
+            }
+            if question
+            else None
+        )
+
+    return {
+        "user_id": user_id,
+        "submission_id": submission_id,
+        "documents": documents,
+        "merged": merged,
+        "correct_answers": correct_answers,
+    }
+
+
+def summarize_submission(graded: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the response body reported for a single graded submission."""
+    total_questions = len(graded["documents"])
+    accuracy = graded["correct_answers"] / total_questions if total_questions else 0.0
+    return {
+        "total_questions": total_questions,
+        "accuracy": accuracy,
+    }
+
+
+def _ledger_id(submission: Dict[str, Any]) -> Dict[str, str]:
+    return {"user_id": submission["user_id"], "submission_id": submission["submission_id"]}
+
+
+async def _claim_submissions(
+    db, graded: List[Dict[str, Any]]
+) -> Tuple[Dict[int, str], Dict[int, int]]:
+    """Claim every keyed submission in the ledger before anything is written.
+
+    Returns each keyed submission's outcome by index: "claimed", "recovered"
+    (taken over from an attempt that died), "applied" (stored earlier) or
+    "in_progress" (another attempt holds the claim), plus the stored count
+    of each applied one.
+    """
+    outcomes: Dict[int, str] = {}
+    applied_counts: Dict[int, int] = {}
+    claims: List[int] = []
+    seen: Set[Tuple[str, str]] = set()
+    for index, submission in enumerate(graded):
+        if not submission.get("submission_id"):
+            continue
+        key = (submission["user_id"], submission["submission_id"])
+        if key in seen:
+            outcomes[index] = "in_progress"
+            continue
+        seen.add(key)
+        claims.append(index)
+    if not claims:
+        return outcomes, applied_counts
+
+    now = datetime.utcnow()
+    ledger = db[SUBMISSION_LEDGER_COLLECTION].with_options(write_concern=DURABLE_WRITES)
+    conflicts: List[int] = []
+    try:
+        await ledger.insert_many(
+            [
+                {"_id": _ledger_id(graded[index]), "status": "pending", "claimed_at": now}
+                for index in claims
+            ],
+            ordered=False,
+        )
+    except BulkWriteError as exc:
+        if exc.details.get("writeConcernErrors"):
+            raise
+        for error in exc.details.get("writeErrors", []):
+            if error.get("code") != DUPLICATE_KEY:
+                raise
+            conflicts.append(claims[error["index"]])
+    for index in claims:
+        outcomes[index] = "claimed"
+    if not conflicts:
+        return outcomes, applied_counts
+
+    entries = await ledger.find(
+        {"_id": {"$in": [_ledger_id(graded[index]) for index in conflicts]}}
+    ).to_list(None)
+    by_key = {(entry["_id"]["user_id"], entry["_id"]["submission_id"]): entry for entry in entries}
+    for index in conflicts:
+        entry = by_key.get((graded[index]["user_id"], graded[index]["submission_id"]))
+        if entry is None:
+            # Released by an attempt that stored only part of it; retry.
+            outcomes[index] = "in_progress"
+        elif entry["status"] == "applied":
+            outcomes[index] = "applied"
+            applied_counts[index] = entry.get("stored", len(graded[index]["documents"]))
+        elif entry["claimed_at"] <= now - SUBMISSION_CLAIM_TIMEOUT and await ledger.find_one_and_update(
+            {"_id": entry["_id"], "status": "pending", "claimed_at": entry["claimed_at"]},
+            {"$set": {"claimed_at": now}},
+        ):
+            outcomes[index] = "recovered"
+        else:
+            outcomes[index] = "in_progress"
+    return outcomes, applied_counts
+
+
+async def _first_time_users(db, user_ids: Set[str], collections: List[str]) -> Set[str]:
+    """Return the users with no stored responses and no complete state yet."""
+    if not user_ids:
+        return set()
+    candidates = user_ids - await backfilled_users(db, user_ids, collections)
+    if not candidates:
+        return set()
+    existing = await db["user_responses"].distinct("user_id", {"user_id": {"$in": list(candidates)}})
+    return candidates - set(existing)
+
+
+async def store_submissions(db, graded: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Durably store many graded submissions with one insert and one state update.
+
+    Inserts are unordered so one bad document does not block the rest; each
+    submission's result reports how many of its responses were stored. A
+    write concern error raises, since nothing in the batch is known to be
+    durable.
+
+    Submissions carrying a client id are idempotent. Each is claimed in the
+    ledger first, and state is only updated for responses this attempt
+    inserted, so concurrent retries cannot apply a response twice. A retry
+    of an applied submission writes nothing; a retry while another attempt
+    holds the claim reports "in_progress". When a claim is taken over from
+    an attempt that died after inserting, whether that attempt updated state
+    is unknown, so the user is read from raw history until rebuilt.
+    """
+    outcomes, applied_counts = await _claim_submissions(db, graded)
+    documents: List[Dict[str, Any]] = []
+    owners: List[Tuple[int, int]] = []
+    for submission_index, submission in enumerate(graded):
+        if outcomes.get(submission_index, "claimed") not in ("claimed", "recovered"):
+            continue
+        for response_index, document in enumerate(submission["documents"]):
+            documents.append(document)
+            owners.append((submission_index, response_index))
+
+    # Weighted state and rollups are always kept current because cohort
+    # percentiles and windowed mastery read them; another configured scorer
+    # maintains its own state alongside.
+    scorer = get_scorer()
+    state_collections = [MASTERY_STATE_COLLECTION]
+    if scorer.collection != MASTERY_STATE_COLLECTION:
+        state_collections.append(scorer.collection)
+    # State created by a user's first submission covers their whole history.
+    first_time = await _first_time_users(
+        db, {graded[submission_index]["user_id"] for submission_index, _ in owners}, state_collections
+    )
+
+    failed: Set[int] = set()
+    # Keyed responses already stored by an earlier attempt of the same submission.
+    existing: Set[int] = set()
+    if documents:
+        collection = db["user_responses"].with_options(write_concern=DURABLE_WRITES)
+        try:
+            await collection.insert_many(documents, ordered=False)
+        except BulkWriteError as exc:
+            if exc.details.get("writeConcernErrors"):
+                raise
+            for error in exc.details.get("writeErrors", []):
+                if error.get("code") == DUPLICATE_KEY and "submission_id" in documents[error["index"]]:
+                    existing.add(error["index"])
+                else:
+                    failed.add(error["index"])
+
+    stored_counts = [0] * len(graded)
+    stored_by_user: Dict[str, List[Dict[str, Any]]] = {}
+    uncertain_users: Set[str] = set()
+    for document_index, (submission_index, response_index) in enumerate(owners):
+        if document_index in failed:
+            continue
+        stored_counts[submission_index] += 1
+        submission = graded[submission_index]
+        if document_index in existing:
+            if outcomes[submission_index] == "recovered":
+                uncertain_users.add(submission["user_id"])
+            continue
+        merged = submission["merged"][response_index]
+        if merged is not None:
+            stored_by_user.setdefault(submission["user_id"], []).append(merged)
+    for submission_index, stored in applied_counts.items():
+        stored_counts[submission_index] = stored
+
+    state_updates = []
+    rollup_updates = []
+    scorer_updates = []
+    review_updates = []
+    for user_id, merged in stored_by_user.items():
+        state_updates.extend(build_state_updates(user_id, group_totals(merged)))
+        rollup_updates.extend(build_rollup_updates(user_id, group_daily_totals(merged)))
+        review_updates.extend(build_review_updates(user_id, merged))
+        if scorer.collection != MASTERY_STATE_COLLECTION:
+            scorer_updates.extend(scorer.build_updates(user_id, merged))
+    writes = [
+        db[collection].with_options(write_concern=DURABLE_WRITES).bulk_write(
+            updates, ordered=ordered
+        )
+        for collection, updates, ordered in (
+            (MASTERY_STATE_COLLECTION, state_updates, False),
+            (DAILY_ROLLUP_COLLECTION, rollup_updates, False),
+            (scorer.collection, scorer_updates, scorer.ordered),
+            # Review steps read the previous interval, so repeats apply in order.
+            (REVIEW_STATE_COLLECTION, review_updates, True),
+        )
+        if updates
+    ]
+    if writes:
+        await asyncio.gather(*writes)
+    await mark_backfilled(db, first_time & set(stored_by_user) - uncertain_users, state_collections)
+    await clear_backfilled(db, uncertain_users, state_collections)
+    await bump_user_versions(db, set(stored_by_user) | uncertain_users)
+
+    # Complete submissions are marked applied; partial ones release their
+    # claim so a retry can store the rest.
+    now = datetime.utcnow()
+    ledger_updates = []
+    for submission_index, submission in enumerate(graded):
+        if outcomes.get(submission_index) not in ("claimed", "recovered"):
+            continue
+        ledger_id = _ledger_id(submission)
+        if stored_counts[submission_index] == len(submission["documents"]):
+            ledger_updates.append(
+                UpdateOne(
+                    {"_id": ledger_id},
+                    {"$set": {"status": "applied", "stored": stored_counts[submission_index], "applied_at": now}},
+                )
+            )
+        else:
+            ledger_updates.append(DeleteOne({"_id": ledger_id}))
+    if ledger_updates:
+        await db[SUBMISSION_LEDGER_COLLECTION].with_options(
+            write_concern=DURABLE_WRITES
+        ).bulk_write(ledger_updates, ordered=False)
+
+    results = []
+    for submission_index, (submission, stored) in enumerate(zip(graded, stored_counts)):
+        result = summarize_submission(submission)
+        result["user_id"] = submission["user_id"]
+        result["stored"] = stored
+        if outcomes.get(submission_index) == "in_progress":
+            result["status"] = "in_progress"
+        else:
+            result["status"] = "stored" if stored == len(submission["documents"]) else "partial"
+        results.append(result)
+    return results
+
+
+class WriteBuffer:
+    """Coalesce submissions from concurrent requests into shared bulk writes.
+
+    Callers await their own result, which resolves only after the flush that
+    carried their documents has been durably written.
+    """
+
+    def __init__(self, max_batch: int, max_delay: float) -> None:
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._pending_documents = 0
+        self._db = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+    async def submit(self, db, graded: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a graded submission and wait until it has been stored."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._db = db
+        self._pending.append((graded, future))
+        self._pending_documents += len(graded["documents"])
+
+        if self._pending_documents >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._start_flush)
+
+        return await future
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        self._pending_documents = 0
+        # The flush serves every request in the batch, so it runs in an empty
+        # context instead of inheriting the request timings of whichever
+        # request started it.
+        task = asyncio.get_running_loop().create_task(
+            self._flush(self._db, batch), context=contextvars.Context()
+        )
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, db, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            results = await store_submissions(db, [graded for graded, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self) -> None:
+        """Flush anything still queued and wait for in-flight writes."""
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+
+_write_buffer = (
+    WriteBuffer(SUBMIT_BUFFER_MAX_BATCH, SUBMIT_BUFFER_MAX_DELAY_MS / 1000.0)
+    if SUBMIT_BUFFER_ENABLED
+    else None
+)
+
+
+def get_write_buffer() -> Optional[WriteBuffer]:
+    """Return the shared write buffer, or None when buffering is disabled."""
+    return _write_buffer
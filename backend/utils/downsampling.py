@@ -0,0 +1,47 @@
+"""Downsampling helpers."""
+
+from typing import List, Sequence, Tuple
+
+
+def lttb(points: Sequence[Tuple[float, float]], threshold: int) -> List[int]:
+    """Return indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept; every other kept point is the
+    one forming the largest triangle with its neighbours' bucket averages.
+    """
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return list(range(count))
+
+    selected = [0]
+    bucket_size = (count - 2) / (threshold - 2)
+    previous = 0
+
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+        next_points = points[next_start:next_end] or points[count - 1:]
+        average_x = sum(point[0] for point in next_points) / len(next_points)
+        average_y = sum(point[1] for point in next_points) / len(next_points)
+
+        previous_x, previous_y = points[previous]
+        best_index = start
+        best_area = -1.0
+        for index in range(start, end):
+            x, y = points[index]
+            area = abs(
+                (previous_x - average_x) * (y - previous_y)
+                - (previous_x - x) * (average_y - previous_y)
+            )
+            if area > best_area:
+                best_area = area
+                best_index = index
+
+        selected.append(best_index)
+        previous = best_index
+
+    selected.append(count - 1)
+    return selected
@@ -18,6 +18,8 @@ export const fetchQuiz = async (userId?: string) => {
 
 export type QuizSubmissionPayload = {
     user_id: string;
+    // Reuse the same id when retrying so the submission is stored once.
+    submission_id?: string;
     responses: Array<{
         question_id: string;
         selected_option: string;